@@ -1,6 +1,7 @@
 """Utils for automated part extraction."""
 
 import csv
+import hashlib
 import json
 import os
 import xml.etree.ElementTree as ET
@@ -49,6 +50,16 @@ with open(IGNORE_LIST, "r") as stream:
     ignore_items = stream.read().split("\n")
 
 
+# Parsed tables are cached here by file hash, shared by every script.
+MXML_CACHE_PATH = os.path.join(
+    os.path.realpath(os.path.dirname(__file__)), ".mxml_cache"
+)
+# Bump this when the cached index format changes.
+MXML_CACHE_VERSION = 2
+# Tables already indexed by this process, (path, kind) -> index.
+MXML_INDEXES = {}
+
+
 PATH_TO_PART_TABLE = os.path.join(
     os.path.realpath(os.path.dirname(__file__)), "part_generator", "DT_PartTable.csv"
 )
@@ -88,15 +99,144 @@ def list_missing_icons():
     return get_buildable_ids_and_icons()
 
 
+def get_file_hash(path):
+    """Hash a file without reading it into memory in one go."""
+    file_hash = hashlib.sha1()
+    with open(path, "rb") as stream:
+        for chunk in iter(lambda: stream.read(1024 * 1024), b""):
+            file_hash.update(chunk)
+    return file_hash.hexdigest()
+
+
+def iter_table_entries(path):
+    """Stream the entries of an MXML table.
+
+    The entries are the children of the properties directly under the root,
+    e.g. each part in the parts list. Every entry is yielded once it has been
+    fully read, then dropped, so the whole tree is never held in memory.
+
+    Yields:
+        tuple: The index of the property the entry belongs to, the name of
+            that property and the entry element.
+    """
+    stack = []
+    property_index = -1
+    for event, element in ET.iterparse(path, events=("start", "end")):
+        if event == "start":
+            stack.append(element)
+            if len(stack) == 2:
+                property_index += 1
+            continue
+        stack.pop()
+        if len(stack) != 2:
+            continue
+        parent = stack[1]
+        yield property_index, parent.attrib.get("name", None), element
+        # The entry is the last child read so far.
+        parent.remove(element)
+        element.clear()
+
+
+def index_objects_table(path):
+    """Get the IDs in the Objects list of a base building objects table."""
+    ids = []
+    for _, property_name, entry in iter_table_entries(path):
+        if property_name != "Objects":
+            continue
+        for data in entry:
+            if data.attrib.get("name", None) == "ID":
+                ids.append(data.attrib["value"])
+    return {"ids": ids}
+
+
+def index_parts_table(path):
+    """Get the model path of each part in the base building parts table."""
+    parts = {}
+    for property_index, _, entry in iter_table_entries(path):
+        if property_index != 0:
+            continue
+        parts[get_id_from_part(entry)] = get_model_path_from_part(entry)
+    return {"parts": parts}
+
+
+def index_product_table(path):
+    """Get the name, icon and category of each product in a product table."""
+    name_index = 1
+    icon_index = 10
+    category_index = 14
+    products = {}
+    for property_index, _, entry in iter_table_entries(path):
+        if property_index != 0:
+            continue
+        products[entry[0].attrib["value"]] = {
+            "name": entry[name_index].attrib["value"],
+            "icon": entry[icon_index][0].attrib["value"],
+            "category": entry[category_index][0].attrib["value"],
+        }
+    return {"products": products}
+
+
+def index_language_table(path):
+    """Get each localisation ID and its text from a language table."""
+    strings = {}
+    for property_index, _, entry in iter_table_entries(path):
+        if property_index != 0:
+            continue
+        strings[entry[0].attrib["value"]] = entry[1].attrib["value"]
+    return {"strings": strings}
+
+
+MXML_INDEXERS = {
+    "objects": index_objects_table,
+    "parts": index_parts_table,
+    "products": index_product_table,
+    "language": index_language_table,
+}
+
+
+def get_table_index(path, kind, refresh=False):
+    """Get the index of an MXML table, only parsing it if it changed.
+
+    Args:
+        path (str): The MXML file.
+        kind (str): The type of table, one of MXML_INDEXERS.
+        refresh (bool): Parse the table even if it is cached.
+
+    Returns:
+        dict: The data the indexer extracted from the table.
+    """
+    key = (os.path.normpath(path), kind)
+    if key in MXML_INDEXES and not refresh:
+        return MXML_INDEXES[key]
+
+    file_hash = get_file_hash(path)
+    cache_file = os.path.join(
+        MXML_CACHE_PATH, "{0}_{1}.json".format(kind, file_hash)
+    )
+    index = None
+    try:
+        if not refresh:
+            with open(cache_file, "r") as stream:
+                cached = json.load(stream)
+            if cached.get("version", None) == MXML_CACHE_VERSION:
+                index = cached["index"]
+    except (OSError, ValueError, KeyError):
+        pass
+
+    if index is None:
+        index = MXML_INDEXERS[kind](path)
+        # Several processes may be indexing at once.
+        os.makedirs(MXML_CACHE_PATH, exist_ok=True)
+        with open(cache_file, "w") as stream:
+            json.dump({"version": MXML_CACHE_VERSION, "index": index}, stream)
+
+    MXML_INDEXES[key] = index
+    return index
+
+
 def list_missing_parts():
     all_buildable_ids = get_buildable_ids_from_product_table_new()
-    parts_tree = ET.parse(BASEBUILDINGPARTS_TABLE_PATH)
-    parts_root = parts_tree.getroot()
-    parts = parts_root[0]
-    parts_data = {}
-    for part in parts:
-        part_id = get_id_from_part(part)
-        parts_data[part_id] = get_model_path_from_part(part)
+    parts_data = get_table_index(BASEBUILDINGPARTS_TABLE_PATH, "parts")["parts"]
 
     all_parts = get_all_existing_parts()
     known_data = {}
@@ -159,15 +299,7 @@ def get_all_existing_parts():
 def get_buildable_ids_from_product_table_new():
     ids = set()
     for path in [LEGACYBASEBUILDINGTABLE_PATH, BASEBUILDINGTABLE_PATH]:
-        products_tree = ET.parse(path)
-        products_root = products_tree.getroot()
-        products = products_root
-        for product in products:
-            if "name" in product.attrib and product.attrib["name"] == "Objects":
-                for object in product:
-                    for data in object:
-                        if "name" in data.attrib and data.attrib["name"] == "ID":
-                            ids.add(data.attrib["value"])
+        ids.update(get_table_index(path, "objects")["ids"])
     return ids
 
 
@@ -187,21 +319,17 @@ def get_buildable_ids_from_product_table(exml):
 
 def get_buildable_ids_and_icons():
     ids = {}
+    buildable_value = "BuildingPart"
     for product_path in [
         PRODUCTTABLE_PATH,
         U3PRODUCTTABLE_PATH,
         MODULARTABLE_PATH,
         BASEPARTPRODUCTSTABLE_PATH,
     ]:
-        icon_index = 10
-        category_index = 14
-        buildable_value = "BuildingPart"
-        products_tree = ET.parse(product_path)
-        products_root = products_tree.getroot()
-        products = products_root[0]
-        for product in products:
-            if product[category_index][0].attrib["value"] == buildable_value:
-                ids[product[0].attrib["value"]] = product[icon_index][0].attrib["value"]
+        products = get_table_index(product_path, "products")["products"]
+        for product_id, product in products.items():
+            if product["category"] == buildable_value:
+                ids[product_id] = product["icon"]
     return ids
 
 
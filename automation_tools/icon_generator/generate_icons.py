@@ -1,5 +1,4 @@
 import os
-import subprocess
 import sys
 
 from PIL import Image
@@ -19,27 +18,3 @@ for icon, path in icon_dict.items():
     image_load = Image.open(os.path.join(PATH_TO_UNPACKED, path.lower()))
     new_image = image_load.resize((64, 64))
     new_image.save(new_path)
-
-# Write QRC.
-file_path = os.path.join(ICON_EXPORT_FOLDER, "icons.qrc")
-return_string = '<!DOCTYPE RCC><RCC version="1.0">\n'
-return_string += "<qresource>\n"
-for part in icon_dict.keys():
-    return_string += '    <file alias="{0}">{0}.PNG</file>\n'.format(part)
-return_string += (
-    '    <file alias="TOP_BAR_REFRESH">../images/TOP_BAR_REFRESH.PNG</file>\n'.format(
-        part
-    )
-)
-return_string += "</qresource>\n"
-return_string += "</RCC>\n"
-
-file_path = os.path.join(ICON_EXPORT_FOLDER, "icons.qrc")
-with open(file_path, "w") as stream:
-    stream.write(return_string)
-
-subprocess.call(
-    "pyside6-rcc.exe -g python {} -o {}".format(
-        file_path, file_path.replace(".qrc", ".py")
-    )
-)
@@ -1,8 +1,15 @@
+"""Generate nice_names.json from the game's localisation tables.
+
+The language tables are streamed and indexed in parallel, one process per
+file. The indexes are cached by file hash, so after a game patch only the
+tables that changed are parsed again. Pass --full to parse every table.
+"""
+import argparse
 import json
 import os
 import sys
-import xml.etree.ElementTree as ET
-from pprint import pprint
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
 
 sys.path.append(os.path.join(os.path.dirname(os.path.realpath(__file__)), ".."))
 
@@ -12,12 +19,9 @@ from automation_utils import (
     PATH_TO_UNPACKED,
     PRODUCTTABLE_PATH,
     U3PRODUCTTABLE_PATH,
-    get_all_existing_parts,
-    get_buildable_ids_from_product_table_new,
+    get_table_index,
 )
 
-all_parts = get_all_existing_parts()
-
 loc_files = [
     "nms_loc1_english.MXML",
     "nms_loc4_english.MXML",
@@ -33,39 +37,49 @@ EXPORT_PATH = os.path.join(
     os.path.dirname(os.path.realpath(__file__)), "export", "nice_names.json"
 )
 
-
-# Build language reference.
-data = {}
-for path in loc_files:
-    language_tree = ET.parse(path)
-    language_root = language_tree.getroot()
-    local_table = language_root[0]
-    for table in local_table:
-        id = table[0].attrib["value"]
-        data[id] = table[1].attrib["value"]
-        # break
-
-# Build
-part_ids = get_buildable_ids_from_product_table_new()
-
 product_tables = [
     PRODUCTTABLE_PATH,
     U3PRODUCTTABLE_PATH,
     MODULARTABLE_PATH,
     BASEPARTPRODUCTSTABLE_PATH,
 ]
-language_ref = {}
-for product_table in product_tables:
-    product_tree = ET.parse(product_table)
-    product_root = product_tree.getroot()
-    table_root = product_root[0]
-    for child in table_root:
-        id = child[0].attrib["value"]
-        name_ref = child[1].attrib["value"]
-        if (child[14][0].attrib["value"] == "BuildingPart") and (name_ref in data):
-            language_ref[id] = data[name_ref]
 
-return_dict = {key: language_ref[key] for key in sorted(language_ref)}
 
-with open(EXPORT_PATH, "w") as stream:
-    json.dump(return_dict, stream, indent=4)
+def index_tables(paths, kind, refresh=False):
+    """Index tables in parallel, returning the indexes in the same order."""
+    index_table = partial(get_table_index, kind=kind, refresh=refresh)
+    with ProcessPoolExecutor() as executor:
+        return list(executor.map(index_table, paths))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "--full",
+        action="store_true",
+        help="Parse every table again instead of using the cache.",
+    )
+    args = parser.parse_args()
+
+    # Build language reference, later tables win like the game.
+    data = {}
+    for index in index_tables(loc_files, "language", refresh=args.full):
+        data.update(index["strings"])
+
+    # Build
+    language_ref = {}
+    for index in index_tables(product_tables, "products", refresh=args.full):
+        for id, product in index["products"].items():
+            name_ref = product["name"]
+            if (product["category"] == "BuildingPart") and (name_ref in data):
+                language_ref[id] = data[name_ref]
+
+    return_dict = {key: language_ref[key] for key in sorted(language_ref)}
+
+    with open(EXPORT_PATH, "w") as stream:
+        json.dump(return_dict, stream, indent=4)
+
+
+# Worker processes import this file, only the main process does the work.
+if __name__ == "__main__":
+    main()
@@ -0,0 +1 @@
+"blender.exe" -b -P ./generate_part_library.py
\ No newline at end of file
@@ -0,0 +1,37 @@
+"""Pack every vanilla part model into the add-on's part library blend file.
+
+Run this in Blender background mode whenever models are added or changed.
+
+    blender.exe -b -P ./generate_part_library.py
+
+Parts whose FBX no longer matches the library are still imported from their
+FBX by the add-on, so an out of date library is slower but never wrong.
+"""
+import os
+import sys
+
+ADDONS_PATH = os.path.join(
+    os.path.dirname(os.path.realpath(__file__)), "..", "..", "src", "addons"
+)
+sys.path.append(ADDONS_PATH)
+
+import no_mans_sky_base_builder.builder as builder
+
+
+def process_blender():
+    nms_builder = builder.Builder()
+    # Mod packs differ per user, so only ship the vanilla parts.
+    vanilla_reference = {
+        part_id: part_info
+        for part_id, part_info in nms_builder.part_reference.items()
+        if part_info["pack"] == "Parts"
+    }
+    nms_builder.part_library.build(vanilla_reference)
+    print(
+        "Wrote {0} parts to {1}".format(
+            len(nms_builder.part_library.index), nms_builder.part_library.library_path
+        )
+    )
+
+
+process_blender()
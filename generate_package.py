@@ -15,8 +15,6 @@ def build_recursive_file_list(dir_path):
             continue
 
         full_path = os.path.join(dir_path, thing)
-        if "icons" in full_path and full_path.endswith(".PNG"):
-            continue
         if os.path.isfile(full_path):
             return_list.append(full_path)
         if os.path.isdir(full_path):
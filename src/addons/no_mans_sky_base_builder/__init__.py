@@ -15,13 +15,16 @@ import imp
 import json
 import os
 import subprocess
+import traceback
 import webbrowser
 
 import bpy
 import bpy.ops
 import bpy.utils
 import bpy.utils.previews
+from bpy.app.handlers import persistent
 import no_mans_sky_base_builder.builder as builder
+import no_mans_sky_base_builder.command_server as command_server
 import no_mans_sky_base_builder.part_overrides.line as line
 import no_mans_sky_base_builder.preset as preset
 import no_mans_sky_base_builder.utils.blend_utils as blend_utils
@@ -44,6 +47,12 @@ PRESET_PATH = os.path.join(USER_PATH, "presets")
 ASSET_BROWSER_PATH = os.path.join(FILE_PATH, "asset_browser")
 
 BUILDER = builder.Builder()
+# Pack -> UI list rows, parts only change when the add-on is reloaded.
+PART_LIST_CACHE = {}
+# Receives commands from the asset browser while it is open.
+COMMAND_SERVER = command_server.CommandServer()
+# Seconds between checks for asset browser commands.
+COMMAND_INTERVAL = 0.05
 GHOSTED_JSON = os.path.join(FILE_PATH, "resources", "ghosted.json")
 ghosted_reference = python_utils.load_dictionary(GHOSTED_JSON)
 GHOSTED_ITEMS = ghosted_reference["GHOSTED"]
@@ -57,15 +66,34 @@ def ShowMessageBox(message="", title="Message Box", icon="INFO"):
     bpy.context.window_manager.popup_menu(draw, title=title, icon=icon)
 
 
+def get_list_pack(nms_tool):
+    """Get the pack shown in the UI list, "PRESETS" for the presets."""
+    if nms_tool.enum_switch == {"PRESETS"}:
+        return "PRESETS"
+    packs = [pack for pack in nms_tool.enum_switch if pack != "PRESETS"]
+    return packs[0] if packs else "Parts"
+
+
 def part_switch(self, context):
     """Toggle method for switching between parts and presets."""
     scene = context.scene
-    part_list = "presets" if self.enum_switch == {"PRESETS"} else "parts"
+    pack = get_list_pack(self)
 
-    if self.enum_switch not in [{"PRESETS"}]:
-        refresh_ui_part_list(scene, part_list, pack=list(self.enum_switch)[0])
+    if pack != "PRESETS":
+        refresh_ui_part_list(scene, "parts", pack=pack)
     else:
-        refresh_ui_part_list(scene, part_list)
+        refresh_ui_part_list(scene, "presets")
+
+
+def line_rig_switch(self, context):
+    """Toggle method for switching how lines follow their controls."""
+    BUILDER.use_line_drivers = self.use_line_drivers
+    BUILDER.rebuild_line_rigs()
+
+
+def preset_instancing_switch(self, context):
+    """Toggle method for placing presets as collection instances."""
+    BUILDER.use_preset_instancing = self.use_preset_instancing
 
 
 def get_line_type_from_enum(context):
@@ -126,6 +154,26 @@ class NMSSettings(PropertyGroup):
         default={"POWER"},
     )
 
+    use_line_drivers: BoolProperty(
+        name="Use Drivers",
+        description=(
+            "Rig cables with drivers. When off, cables are moved by a single "
+            "update handler, which is faster on large bases."
+        ),
+        default=True,
+        update=line_rig_switch,
+    )
+
+    use_preset_instancing: BoolProperty(
+        name="Instance Presets",
+        description=(
+            "Build each preset once and place instances of it, rather than "
+            "copying every part. Instances are flattened on export."
+        ),
+        default=False,
+        update=preset_instancing_switch,
+    )
+
     preset_name: StringProperty(
         name="preset_name", description="The of a preset.", default="", maxlen=1024
     )
@@ -530,13 +578,24 @@ class NMSSettings(PropertyGroup):
         # Deselect all
         bpy.ops.object.select_all(action="DESELECT")
         # Select NMS Items
-        for bpy_object in bpy.data.objects:
-            id_check = "ObjectID" in bpy_object
-            preset_check = "PresetID" in bpy_object
-            light_check = "NMS_LIGHT" in bpy_object
-            rig_check = "rig_item" in bpy_object
-            if any([id_check, preset_check, light_check, rig_check]):
-                blend_utils.remove_object(bpy_object.name)
+        nms_objects = {}
+        for key in ["ObjectID", "PresetID", "NMS_LIGHT", "rig_item"]:
+            for bpy_object in BUILDER.registry.get_objects(key):
+                nms_objects[bpy_object.name] = bpy_object
+        for name in nms_objects:
+            blend_utils.remove_object(name)
+
+        # Remove the hidden collections of instanced presets, and their
+        # template parts, which the registry leaves out.
+        prefix = preset.Preset.INSTANCE_COLLECTION_PREFIX
+        for collection in list(bpy.data.collections):
+            if not collection.name.startswith(prefix):
+                continue
+            templates = list(collection.objects)
+            for template in templates:
+                BUILDER.registry.remove(template.as_pointer())
+            bpy.data.batch_remove(templates)
+            bpy.data.collections.remove(collection)
 
         # Reset room vis
         self.room_vis_switch = 0
@@ -583,16 +642,15 @@ class NMSSettings(PropertyGroup):
                 material.diffuse_color[3] = 0.07 if show_transparent else 1.0
 
         # Iterate object for selection.
-        for ob in bpy.data.objects:
-            if "ObjectID" in ob:
-                if ob["ObjectID"] in GHOSTED_ITEMS:
-                    is_preset = ob.get("belongs_to_preset", False)
-                    # Normal
-                    ob.hide_viewport = hidden
-                    # ob.show_transparent = show_transparent
-                    if not is_preset:
-                        ob.hide_select = hide_select
-                    ob.select_set(False)
+        for object_id in GHOSTED_ITEMS:
+            for ob in BUILDER.registry.get_objects("ObjectID", object_id):
+                is_preset = ob.get("belongs_to_preset", False)
+                # Normal
+                ob.hide_viewport = hidden
+                # ob.show_transparent = show_transparent
+                if not is_preset:
+                    ob.hide_select = hide_select
+                ob.select_set(False)
 
     def delete(self):
         """Delete the selected object and everything below."""
@@ -880,7 +938,7 @@ class NMS_PT_snap_panel(Panel):
         part_box = snap_column.box()
         splitter = part_box.split(factor=0.7)
         splitter.label(text="Part Count:")
-        part_count = len([obj for obj in bpy.data.objects if "ObjectID" in obj])
+        part_count = BUILDER.registry.count("ObjectID")
         splitter.label(text="{}".format(part_count))
 
         # Create Snapping box.
@@ -994,9 +1052,13 @@ class NMS_PT_logic_panel(Panel):
         col.label(text="Cables")
         enum_row = col.row()
         enum_row.prop(nms_tool, "line_switch")
+        col.prop(nms_tool, "use_line_drivers")
         row = col.row()
         row.operator("object.nms_point", icon="EMPTY_DATA")
-        row.operator("object.nms_connect", icon="PARTICLES")
+        connect_op = row.operator("object.nms_connect", icon="PARTICLES")
+        connect_op.use_tree = False
+        route_op = row.operator("object.nms_connect", text="Route", icon="LINKED")
+        route_op.use_tree = True
         divide_row = col.row()
         divide_row.operator("object.nms_divide", icon="LINCURVE")
         divide_row.operator("object.nms_split", icon="MOD_PHYSICS")
@@ -1038,6 +1100,7 @@ class NMS_PT_build_panel(Panel):
         row = col.row(align=True)
         row.operator("object.nms_get_more_presets", icon="WORLD_DATA")
         row.operator("object.nms_open_preset_folder", icon="FILE_FOLDER")
+        col.prop(nms_tool, "use_preset_instancing")
         layout.prop(nms_tool, "enum_switch", expand=True)
         part_list = layout.template_list(
             "NMS_UL_actions_list",
@@ -1052,6 +1115,22 @@ class NMS_PT_build_panel(Panel):
 class NMS_UL_actions_list(bpy.types.UIList):
     previous_layout = None
 
+    def filter_items(self, context, data, propname):
+        """Only show the rows of the current pack, as well as any name filter."""
+        items = getattr(data, propname)
+        pack = get_list_pack(context.scene.nms_base_tool)
+        name_flags = bpy.types.UI_UL_list.filter_items_by_name(
+            self.filter_name, self.bitflag_filter_item, items, "name"
+        )
+        invert = self.use_filter_invert
+        flags = []
+        for index, item in enumerate(items):
+            name_match = not name_flags or bool(name_flags[index])
+            # Blender inverts every flag, so only the name match should be.
+            visible = item.pack == pack and (name_match != invert)
+            flags.append(self.bitflag_filter_item if visible != invert else 0)
+        return flags, []
+
     def draw_item(
         self, context, layout, data, item, icon, active_data, active_propname
     ):
@@ -1096,6 +1175,7 @@ class PartCollection(bpy.types.PropertyGroup):
     title: bpy.props.StringProperty()
     description: bpy.props.StringProperty()
     item_type: bpy.props.StringProperty()
+    pack: bpy.props.StringProperty()
 
 
 def create_sublists(input_list, n=3):
@@ -1124,6 +1204,7 @@ def generate_ui_list_data(item_type="parts", pack=None):
 
     Return:
         list: tuple (str, str): Label and Description of items for the UIList.
+            The parts of a pack are cached, and returned as a tuple.
     """
     ui_list_data = []
     # Presets
@@ -1141,6 +1222,8 @@ def generate_ui_list_data(item_type="parts", pack=None):
             ui_list_data.append(("Uncategorized Presets", ""))
             for _preset in sorted(presets):
                 ui_list_data.append(("", _preset))
+    elif (pack or "Parts") in PART_LIST_CACHE:
+        ui_list_data = PART_LIST_CACHE[pack or "Parts"]
     else:
         # Packs/Parts
         for category in BUILDER.get_categories(pack=pack):
@@ -1151,31 +1234,55 @@ def generate_ui_list_data(item_type="parts", pack=None):
             for part in new_parts:
                 joined_list = ",".join(part)
                 ui_list_data.append(("", joined_list))
+        ui_list_data = tuple(ui_list_data)
+        PART_LIST_CACHE[pack or "Parts"] = ui_list_data
     return ui_list_data
 
 
+def get_ui_row_name(pack, index, label, description):
+    return " ".join((pack, str(index), label, description))
+
+
 def refresh_ui_part_list(scene, item_type="parts", pack=None):
     """Refresh the UI List.
 
+    The rows of every pack shown so far are kept, and the UI list only shows
+    the current pack's. Switching back to a pack only adds its rows again
+    if they changed, the presets are always added again.
+
     Args:
         item_type: The type of items we want to retrieve.
             options - "presets", "parts".
+        pack (str): The model pack of the parts. Defaults to vanilla 'Parts'.
     """
-    # Clear the scene col.
-    try:
-        scene.col.clear()
-    except:
-        pass
+    row_pack = (pack or "Parts") if item_type == "parts" else "PRESETS"
 
     # Get part data based on
     ui_list_data = generate_ui_list_data(item_type=item_type, pack=pack)
+
+    # Keep the pack's rows if its first and last rows are unchanged.
+    if item_type == "parts" and ui_list_data:
+        first_name = get_ui_row_name(row_pack, 1, *ui_list_data[0])
+        last_name = get_ui_row_name(
+            row_pack, len(ui_list_data), *ui_list_data[-1]
+        )
+        if scene.col.find(first_name) != -1 and scene.col.find(last_name) != -1:
+            return
+
+    # Remove the old rows of the pack, and any saved before rows had a
+    # pack, from the end so the indices hold.
+    for index in reversed(range(len(scene.col))):
+        if scene.col[index].pack in (row_pack, ""):
+            scene.col.remove(index)
+
     # Create items with labels and descriptions.
     for i, (label, description) in enumerate(ui_list_data, 1):
         item = scene.col.add()
         item.title = label.title().replace("_", " ")
         item.description = description
         item.item_type = item_type
-        item.name = " ".join((str(i), label, description))
+        item.pack = row_pack
+        item.name = get_ui_row_name(row_pack, i, label, description)
 
 
 # Operators ---
@@ -1291,6 +1398,76 @@ class SaveAsPreset(bpy.types.Operator):
         return wm.invoke_props_dialog(self)
 
 
+def build_browser_part(part_id):
+    """Build a part or preset picked in the asset browser.
+
+    The new item is selected and snapped to the previous selection.
+    """
+    selection = blend_utils.get_current_selection()
+
+    # Build item
+    if part_id in preset.Preset.get_presets():
+        new_item = BUILDER.add_preset(part_id)
+    else:
+        new_item = BUILDER.add_part(part_id)
+        if hasattr(new_item, "build_rig"):
+            new_item.build_rig()
+
+    # Make this item the selected.
+    new_item.select()
+
+    # If there was a previous selection, snap the new item to it.
+    if selection:
+        builder_selection = BUILDER.get_builder_object_from_bpy_object(
+            selection
+        )
+        if builder_selection:
+            new_item.snap_to(builder_selection)
+
+
+def edit_browser_preset(preset_id):
+    """Open a preset picked in the asset browser in a new file."""
+    if preset_id not in preset.Preset.get_presets():
+        return
+    nms_tool = bpy.context.scene.nms_base_tool
+    nms_tool.new_file()
+    preset.Preset(
+        preset_id=preset_id,
+        builder_object=BUILDER,
+        create_control=False,
+        apply_shader=False,
+        build_rigs=True
+    )
+    BUILDER.build_rigs()
+    BUILDER.optimise_control_points()
+
+
+def run_browser_command(command):
+    """Run one command sent by the asset browser."""
+    name = command["command"]
+    if name == "build_part":
+        build_browser_part(command["part_id"])
+    elif name == "edit_preset":
+        edit_browser_preset(command["preset_id"])
+    elif name == "close":
+        COMMAND_SERVER.stop()
+    else:
+        print("Unknown asset browser command: {0}".format(name))
+
+
+def drain_browser_commands():
+    """Timer callback running the commands the asset browser sent."""
+    for command in COMMAND_SERVER.poll():
+        try:
+            run_browser_command(command)
+        except Exception:
+            traceback.print_exc()
+    if not COMMAND_SERVER.running:
+        # Returning None unregisters the timer.
+        return None
+    return COMMAND_INTERVAL
+
+
 class LoadFancyUI(bpy.types.Operator):
     """Launch the standalone asset browser."""
 
@@ -1298,10 +1475,18 @@ class LoadFancyUI(bpy.types.Operator):
     bl_label = "Launch Asset Browser..."
 
     def execute(self, context):
-        # Load web page.
-        bpy.ops.wm.bpy_externall_server(speed=0.15, mode="start")
+        # Listen for the browser's commands.
+        COMMAND_SERVER.start()
+        if not bpy.app.timers.is_registered(drain_browser_commands):
+            bpy.app.timers.register(
+                drain_browser_commands,
+                first_interval=COMMAND_INTERVAL,
+                persistent=True
+            )
         loader = os.path.join(ASSET_BROWSER_PATH, "load.py").replace("\\", "/")
-        subprocess.Popen(["python", loader])
+        subprocess.Popen(
+            ["python", loader, str(COMMAND_SERVER.port), COMMAND_SERVER.token]
+        )
         return {"FINISHED"}
 
 
@@ -1589,6 +1774,15 @@ class Connect(bpy.types.Operator):
     bl_label = "Connect"
     bl_options = {"UNDO", "REGISTER"}
 
+    use_tree: BoolProperty(
+        name="Shortest Route",
+        description=(
+            "Connect everything with the shortest set of cables, rather than "
+            "connecting everything to the active object."
+        ),
+        default=False,
+    )
+
     def execute(self, context):
         # Validate selection.
         selected_objects = [
@@ -1601,6 +1795,10 @@ class Connect(bpy.types.Operator):
             ShowMessageBox(message=message, title="Connect")
             return {"FINISHED"}
 
+        if self.use_tree:
+            self.route(context, selected_objects)
+            return {"FINISHED"}
+
         # Test this after selection for better error reporting
         if not bpy.context.active_object:
             message = "Make sure one object is the active object (shift select the object to connect everything to)."
@@ -1643,6 +1841,14 @@ class Connect(bpy.types.Operator):
 
         return {"FINISHED"}
 
+    def route(self, context, selected_objects):
+        """Connect the selection with a minimum spanning tree of cables."""
+        connections = line.Line.route_control_points(selected_objects, BUILDER)
+        line_object_id = get_line_type_from_enum(context)
+        for start_point, end_point in connections:
+            power_line = BUILDER.add_part(line_object_id, build_rigs=False)
+            power_line.build_rig(start=start_point, end=end_point)
+
 
 class Divide(bpy.types.Operator):
     bl_idname = "object.nms_divide"
@@ -1707,16 +1913,12 @@ class SelectConnected(bpy.types.Operator):
     bl_options = {"UNDO", "REGISTER"}
 
     def execute(self, context):
-        selected_objects = [
-            BUILDER.get_builder_object_from_bpy_object(o)
-            for o in bpy.context.selected_objects
-        ]
-
+        graph = BUILDER.get_snap_graph("POWER")
         newly_selected = set()
-        for o in selected_objects:
-            newly_selected.update(o.get_connected_snapped_objects("POWER"))
+        for o in bpy.context.selected_objects:
+            newly_selected.update(graph.get_neighbours(o))
         for o in newly_selected:
-            o.object.select_set(True)
+            o.select_set(True)
         return {"FINISHED"}
 
 
@@ -1726,25 +1928,23 @@ class SelectFloating(bpy.types.Operator):
     bl_options = {"UNDO", "REGISTER"}
 
     def execute(self, context):
-        for part in BUILDER.get_all_parts(include_lines=True):
-            if not "SnapID" in part:
-                continue
-            part = BUILDER.get_builder_object_from_bpy_object(part)
-            if part.snap_id != "POWER_CONTROL":
-                continue
+        graph = BUILDER.get_snap_graph("POWER")
+        for part in BUILDER.registry.get_objects("SnapID", "POWER_CONTROL"):
             is_connected_to_object = False
             num_line_connections = 0
-            for target in part.get_connected_snapped_objects(
-                "POWER", include_lines=False
-            ):
-                if not hasattr(target, "start_control"):
+            for target in graph.get_neighbours(part):
+                # Skip other control points.
+                if "ObjectID" not in target:
+                    continue
+                target_class = BUILDER.get_part_class(target["ObjectID"])
+                if not issubclass(target_class, line.Line):
                     is_connected_to_object = True
                     break
                 else:
                     num_line_connections += 1
 
             if not is_connected_to_object and num_line_connections < 2:
-                part.object.select_set(True)
+                part.select_set(True)
 
         return {"FINISHED"}
 
@@ -1877,6 +2077,57 @@ class LogicBeatSwitch(bpy.types.Operator):
         return {"FINISHED"}
 
 
+# Registry Handlers ---
+@persistent
+def update_registry(scene, depsgraph):
+    """Re-index any objects changed outside of the builder."""
+    for update in depsgraph.updates:
+        if isinstance(update.id, bpy.types.Object):
+            BUILDER.registry.update(update.id.original)
+            BUILDER.snap_points.update(update.id.original)
+
+
+@persistent
+def invalidate_registry(*args):
+    """Undo, redo and file loads replace every object, so start again."""
+    BUILDER.registry.invalidate()
+    BUILDER.snap_points.invalidate()
+
+
+@persistent
+def evaluate_line_rigs(scene, depsgraph):
+    """Move lines that don't use drivers when their controls move."""
+    if BUILDER.use_line_drivers:
+        return
+    moved_controls = [
+        update.id.original.name for update in depsgraph.updates
+        if isinstance(update.id, bpy.types.Object)
+        and update.is_updated_transform
+        and "rig_item" in update.id.original
+    ]
+    if moved_controls:
+        BUILDER.line_rigs.evaluate_controls(moved_controls)
+
+
+@persistent
+def load_builder_settings(*args):
+    """Use the rig and preset modes saved with the file."""
+    nms_tool = bpy.context.scene.nms_base_tool
+    BUILDER.use_line_drivers = nms_tool.use_line_drivers
+    BUILDER.use_preset_instancing = nms_tool.use_preset_instancing
+
+
+# Registered in order, the registry has to be up to date first.
+scene_handlers = (
+    (bpy.app.handlers.depsgraph_update_post, update_registry),
+    (bpy.app.handlers.depsgraph_update_post, evaluate_line_rigs),
+    (bpy.app.handlers.undo_post, invalidate_registry),
+    (bpy.app.handlers.redo_post, invalidate_registry),
+    (bpy.app.handlers.load_post, invalidate_registry),
+    (bpy.app.handlers.load_post, load_builder_settings),
+)
+
+
 # We can store multiple preview collections here,
 # however in this example we only store "main"
 preview_collections = {}
@@ -1963,12 +2214,25 @@ def register():
     bpy.types.Scene.col = bpy.props.CollectionProperty(type=PartCollection)
     bpy.types.Scene.col_idx = bpy.props.IntProperty(default=0)
 
+    # Keep the scene registry and line rigs up to date.
+    for handlers, handler in scene_handlers:
+        if handler not in handlers:
+            handlers.append(handler)
+
 
 def unregister():
     for pcoll in preview_collections.values():
         bpy.utils.previews.remove(pcoll)
     preview_collections.clear()
 
+    for handlers, handler in scene_handlers:
+        if handler in handlers:
+            handlers.remove(handler)
+
+    COMMAND_SERVER.stop()
+    if bpy.app.timers.is_registered(drain_browser_commands):
+        bpy.app.timers.unregister(drain_browser_commands)
+
     for _class in reversed(classes):
         bpy.utils.unregister_class(_class)
     del bpy.types.Scene.nms_base_tool
@@ -0,0 +1,104 @@
+"""A precompiled catalogue of the parts shown in the asset browser.
+
+The browser layout lives in asset_data.yaml, which PyYAML parses slowly
+without its C loader, and the part names live in nice_names.json. The
+catalogue merges the layout, the nice name of each listed part and the
+icon file of each part into one JSON file in the user folder. It is only
+rebuilt when the size or mtime of a source changes, otherwise startup
+reads a single JSON file.
+"""
+import json
+import os
+
+FILE_DIR = os.path.dirname(os.path.realpath(__file__))
+LAYOUT_FILE = os.path.join(FILE_DIR, "..", "resources", "asset_data.yaml")
+NICE_NAMES_FILE = os.path.join(FILE_DIR, "..", "resources", "nice_names.json")
+ICON_PATH = os.path.join(FILE_DIR, "icons")
+USER_PATH = os.path.join(os.path.expanduser("~"), "NoMansSkyBaseBuilder")
+CATALOGUE_FILE = os.path.join(USER_PATH, "browser_catalogue.json")
+# Bump this to throw away catalogues written by older versions.
+CATALOGUE_VERSION = 1
+
+
+def get_source_stamps():
+    """Get the mtime and size of every source of the catalogue."""
+    stamps = {}
+    for source in (LAYOUT_FILE, NICE_NAMES_FILE, ICON_PATH):
+        try:
+            stat = os.stat(source)
+        except OSError:
+            stamps[os.path.basename(source)] = None
+            continue
+        stamps[os.path.basename(source)] = [stat.st_mtime, stat.st_size]
+    return stamps
+
+
+def build_catalogue():
+    """Read the source files and merge them into a catalogue.
+
+    Returns:
+        dict: The "layout" as a list of [category, [[sub category,
+            [part IDs]]]], the "nice_names" of the listed parts and the
+            "icons" file name of each part ID.
+    """
+    # Only needed when the sources changed.
+    import yaml
+
+    with open(LAYOUT_FILE, "r") as stream:
+        layout_data = yaml.safe_load(stream)
+    with open(NICE_NAMES_FILE, "r") as stream:
+        nice_name_data = json.load(stream)
+
+    layout = []
+    nice_names = {}
+    for category_data in layout_data:
+        for category, sub_category_data in category_data.items():
+            sub_categories = []
+            for data in sub_category_data or []:
+                for sub_category, items in data.items():
+                    part_ids = [
+                        item for item in items or [] if isinstance(item, str)
+                    ]
+                    for part_id in part_ids:
+                        nice_names[part_id] = nice_name_data.get(
+                            part_id, part_id
+                        )
+                    sub_categories.append([sub_category, part_ids])
+            layout.append([category, sub_categories])
+
+    icons = {}
+    if os.path.isdir(ICON_PATH):
+        for file_name in os.listdir(ICON_PATH):
+            stem, extension = os.path.splitext(file_name)
+            if extension.lower() == ".png":
+                icons[stem] = file_name
+
+    return {"layout": layout, "nice_names": nice_names, "icons": icons}
+
+
+def load_catalogue():
+    """Get the catalogue, rebuilding it if any of its sources changed."""
+    stamps = get_source_stamps()
+    try:
+        with open(CATALOGUE_FILE, "r") as stream:
+            catalogue = json.load(stream)
+        if (
+            catalogue.get("version", None) == CATALOGUE_VERSION
+            and catalogue.get("sources", None) == stamps
+        ):
+            return catalogue
+    except (OSError, ValueError, AttributeError):
+        pass
+
+    catalogue = build_catalogue()
+    catalogue["version"] = CATALOGUE_VERSION
+    catalogue["sources"] = stamps
+    try:
+        if not os.path.exists(USER_PATH):
+            os.makedirs(USER_PATH)
+        with open(CATALOGUE_FILE, "w") as stream:
+            json.dump(catalogue, stream)
+    except OSError:
+        # The catalogue is only a cache, we can build it again next time.
+        pass
+    return catalogue
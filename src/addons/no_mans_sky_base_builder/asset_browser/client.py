@@ -0,0 +1,84 @@
+"""Send commands from the asset browser to Blender.
+
+The add-on listens on a loopback socket while the asset browser is open, and
+passes the port and a random token to the browser on the command line. Each
+connection sends one line of JSON, either a single command or a list of
+commands that are run in order, and is then closed.
+
+A command is a dictionary with a "command" name, the "token" and its
+arguments, e.g. {"command": "build_part", "token": "...", "part_id":
+"CUBEROOM"}. Any other local process can connect to the port, so Blender
+drops commands without the right token. The commands Blender understands
+are:
+
+    build_part (part_id): Build a part or preset, snapped to the selection.
+    edit_preset (preset_id): Open a preset in a new file to edit it.
+    close: The browser was closed, stop listening.
+
+This module doesn't need Qt, so the add-on can share the protocol constants.
+"""
+import json
+import socket
+
+HOST = "127.0.0.1"
+TOKEN_KEY = "token"
+ENCODING = "utf-8"
+# Seconds to wait for Blender to accept a connection.
+TIMEOUT = 2.0
+
+
+def encode_commands(commands):
+    """Turn commands into the bytes sent over the socket.
+
+    Args:
+        commands (dict or list): A command, or a list of commands.
+
+    Returns:
+        bytes: One line of JSON.
+    """
+    return (json.dumps(commands) + "\n").encode(ENCODING)
+
+
+def decode_commands(line):
+    """Turn a line received from the socket back into a list of commands.
+
+    Args:
+        line (bytes): One line of JSON.
+
+    Returns:
+        list: The command dictionaries, empty if the line isn't valid.
+    """
+    try:
+        data = json.loads(line.decode(ENCODING))
+    except ValueError:
+        return []
+    if isinstance(data, dict):
+        data = [data]
+    if not isinstance(data, list):
+        return []
+    return [
+        command for command in data
+        if isinstance(command, dict) and "command" in command
+    ]
+
+
+def send_commands(port, commands, token=None):
+    """Send one or more commands to Blender in a single round trip.
+
+    Args:
+        port (int): The port the add-on is listening on.
+        commands (dict or list): A command, or a list of commands.
+        token (str): The token Blender passed to the browser.
+
+    Returns:
+        bool: Whether the commands were sent.
+    """
+    if isinstance(commands, dict):
+        commands = [commands]
+    commands = [dict(command, **{TOKEN_KEY: token}) for command in commands]
+    try:
+        with socket.create_connection((HOST, port), timeout=TIMEOUT) as stream:
+            stream.sendall(encode_commands(commands))
+    except OSError:
+        return False
+    return True
@@ -1,101 +1,118 @@
-import json
-import os
-
 try:
   from PySide6 import QtCore, QtGui, QtWidgets
 except ImportError:
   from PySide2 import QtCore, QtGui, QtWidgets
 
-import asset_browser.icons.icons
+from asset_browser.model import ITEM_ID_ROLE
+from asset_browser.thumbnails import THUMB_SIZE
 
-THUMB_SIZE = 55
 ITEM_SIZE = 80
 FONT_SIZE = 7
-
-FILE_DIR = os.path.dirname(os.path.realpath(__file__))
-ICON_PATH = os.path.join(FILE_DIR, "icons")
-
-class Thumb(QtWidgets.QLabel):
-    def __init__(self, part_id=None, *args, **kwargs):
-        super(Thumb, self).__init__(*args, **kwargs)
-        part_id = part_id or ""
-        icon_path = ":{}".format(part_id)
-        if QtCore.QFile.exists(icon_path):
-            pixmap = QtGui.QPixmap(icon_path)
-            scaled = pixmap.scaled(THUMB_SIZE, THUMB_SIZE, QtCore.Qt.KeepAspectRatio, QtCore.Qt.SmoothTransformation)
-            self.setPixmap(scaled)
-        self.setMinimumSize(QtCore.QSize(THUMB_SIZE, THUMB_SIZE))
-        self.setMaximumSize(QtCore.QSize(THUMB_SIZE, THUMB_SIZE))
-        self.setAlignment(QtCore.Qt.AlignCenter)
-
-class Item(QtWidgets.QFrame):
-
-    clicked = QtCore.Signal()
-
-    def __init__(self, item_id=None, label=None, *args, **kwargs):
-        super(Item, self).__init__(*args, **kwargs)
-        self.label = label or ""
-        self.item_id = item_id or ""
-        self.setToolTip(self.item_id)
-        self.setMinimumSize(QtCore.QSize(ITEM_SIZE, ITEM_SIZE))
-        self.setMaximumSize(QtCore.QSize(ITEM_SIZE, ITEM_SIZE))
-        self.main_layout = QtWidgets.QVBoxLayout(self)
-        self.main_layout.setContentsMargins(5, 5, 5, 5)
-        self.main_layout.setAlignment(QtCore.Qt.AlignCenter | QtCore.Qt.AlignTop)
-
-        self._build_ui()
-        self._layout()
-        self.setCursor(QtGui.QCursor(QtCore.Qt.PointingHandCursor))
-
-    def _build_ui(self):
-        self.thumb = Thumb(part_id=self.item_id, parent=self)
-        self.label_widget = QtWidgets.QLabel(self.label, parent=self)
-        self.label_widget.setAlignment(QtCore.Qt.AlignCenter)
-        self.label_widget.setWordWrap(True)
-        font = QtGui.QFont("Decorative", FONT_SIZE)
-        self.label_widget.setFont(font)
-        self.label_widget.setMinimumWidth(THUMB_SIZE)
-        self.label_widget.setMaximumWidth(THUMB_SIZE)
-
-    def _layout(self):
-        self.main_layout.addWidget(self.thumb, QtCore.Qt.AlignCenter)
-        self.main_layout.addWidget(self.label_widget, QtCore.Qt.AlignCenter)
-
-
-    def mousePressEvent(self, event):
-        self.clicked.emit()
-
-
-class Preset(QtWidgets.QFrame):
-
-    clicked = QtCore.Signal()
-    editClicked = QtCore.Signal()
-
-    def __init__(self, item_id=None, label=None, *args, **kwargs):
-        super(Preset, self).__init__(*args, **kwargs)
-        self.label = label or ""
-        self.item_id = item_id or ""
-        self.setToolTip(self.item_id)
-        self.main_layout = QtWidgets.QHBoxLayout(self)
-        self.main_layout.setContentsMargins(5, 5, 5, 5)
-        self.main_layout.setAlignment(QtCore.Qt.AlignCenter | QtCore.Qt.AlignTop)
-
-        self._build_ui()
-        self._layout()
-        self._setup_ui()
-        self.setCursor(QtGui.QCursor(QtCore.Qt.PointingHandCursor))
-
-    def _build_ui(self):
-        self.label_button = QtWidgets.QPushButton(self.label, parent=self)
-        self.label_button.setSizePolicy(QtWidgets.QSizePolicy.Expanding, QtWidgets.QSizePolicy.Fixed)
-        font = QtGui.QFont("Decorative", 10)
-        self.label_button.setFont(font)
-        self.edit_button = QtWidgets.QPushButton("Edit" , parent=self)
-
-    def _layout(self):
-        self.main_layout.addWidget(self.label_button)
-        self.main_layout.addWidget(self.edit_button)
-
-    def _setup_ui(self):
-        self.label_button.clicked.connect(self.clicked.emit)
-        self.edit_button.clicked.connect(self.editClicked.emit)
+PRESET_HEIGHT = 34
+PRESET_FONT_SIZE = 10
+EDIT_WIDTH = 60
+MARGIN = 5
+
+ITEM_COLOUR = QtGui.QColor(0, 0, 0, 102)
+HOVER_COLOUR = QtGui.QColor(105, 105, 105, 102)
+THUMB_COLOUR = QtGui.QColor("#b0cada")
+TEXT_COLOUR = QtGui.QColor("#FFF")
+
+
+def paint_background(painter, option):
+    """Paint the rounded background of an item, lit up under the mouse."""
+    hovered = option.state & QtWidgets.QStyle.State_MouseOver
+    painter.setPen(QtCore.Qt.NoPen)
+    painter.setBrush(HOVER_COLOUR if hovered else ITEM_COLOUR)
+    painter.drawRoundedRect(option.rect.adjusted(1, 1, -1, -1), 4, 4)
+
+
+class ItemDelegate(QtWidgets.QStyledItemDelegate):
+    """Paints a part as a thumbnail with its name underneath."""
+
+    def sizeHint(self, option, index):
+        return QtCore.QSize(ITEM_SIZE, ITEM_SIZE)
+
+    def paint(self, painter, option, index):
+        painter.save()
+        painter.setRenderHint(QtGui.QPainter.Antialiasing)
+        paint_background(painter, option)
+
+        # Thumbnail.
+        rect = option.rect
+        thumb_rect = QtCore.QRect(
+            rect.x() + (rect.width() - THUMB_SIZE) // 2,
+            rect.y() + MARGIN,
+            THUMB_SIZE,
+            THUMB_SIZE
+        )
+        painter.setBrush(THUMB_COLOUR)
+        painter.drawRoundedRect(thumb_rect, 4, 4)
+        pixmap = index.data(QtCore.Qt.DecorationRole)
+        if pixmap:
+            pixmap_rect = QtCore.QRect(QtCore.QPoint(), pixmap.size())
+            pixmap_rect.moveCenter(thumb_rect.center())
+            painter.drawPixmap(pixmap_rect, pixmap)
+
+        # Label.
+        label_rect = QtCore.QRect(
+            thumb_rect.x(),
+            thumb_rect.bottom() + 1,
+            THUMB_SIZE,
+            rect.bottom() - thumb_rect.bottom()
+        )
+        painter.setFont(QtGui.QFont("Decorative", FONT_SIZE))
+        painter.setPen(TEXT_COLOUR)
+        painter.drawText(
+            label_rect,
+            QtCore.Qt.AlignHCenter | QtCore.Qt.AlignTop | QtCore.Qt.TextWordWrap,
+            index.data(QtCore.Qt.DisplayRole)
+        )
+        painter.restore()
+
+
+class PresetDelegate(QtWidgets.QStyledItemDelegate):
+    """Paints a preset as its name with an edit button on the right."""
+
+    clicked = QtCore.Signal(str)
+    editClicked = QtCore.Signal(str)
+
+    @staticmethod
+    def get_edit_rect(rect):
+        """Get the area of the edit button inside an item."""
+        return QtCore.QRect(
+            rect.right() - EDIT_WIDTH, rect.y(), EDIT_WIDTH, rect.height()
+        )
+
+    def sizeHint(self, option, index):
+        return QtCore.QSize(option.rect.width(), PRESET_HEIGHT)
+
+    def paint(self, painter, option, index):
+        painter.save()
+        painter.setRenderHint(QtGui.QPainter.Antialiasing)
+        paint_background(painter, option)
+
+        edit_rect = self.get_edit_rect(option.rect)
+        label_rect = option.rect.adjusted(10, 0, -EDIT_WIDTH, 0)
+        painter.setPen(TEXT_COLOUR)
+        painter.setFont(QtGui.QFont("Decorative", PRESET_FONT_SIZE))
+        painter.drawText(
+            label_rect,
+            QtCore.Qt.AlignLeft | QtCore.Qt.AlignVCenter,
+            index.data(QtCore.Qt.DisplayRole)
+        )
+        painter.setFont(QtGui.QFont())
+        painter.drawText(edit_rect, QtCore.Qt.AlignCenter, "Edit")
+        painter.restore()
+
+    def editorEvent(self, event, model, option, index):
+        if event.type() != QtCore.QEvent.MouseButtonRelease:
+            return False
+        if event.button() != QtCore.Qt.LeftButton:
+            return False
+        item_id = index.data(ITEM_ID_ROLE)
+        if self.get_edit_rect(option.rect).contains(event.pos()):
+            self.editClicked.emit(item_id)
+        else:
+            self.clicked.emit(item_id)
+        return True
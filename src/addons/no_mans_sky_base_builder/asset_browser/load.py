@@ -43,4 +43,8 @@ sys.path.append(ASSET_BROWSER_PATH)
 
 import asset_browser.main
 
-asset_browser.main.load()
+# Blender passes the port it listens for commands on, and the token the
+# commands have to carry.
+port = int(sys.argv[1]) if len(sys.argv) > 1 else None
+token = sys.argv[2] if len(sys.argv) > 2 else None
+asset_browser.main.load(port=port, token=token)
@@ -1,43 +1,41 @@
 import ctypes
-import json
 import os
 import sys
-import tempfile
-import time
-from functools import partial
-
-import yaml
 
 try:
   from PySide6 import QtCore, QtGui, QtWidgets
 except ImportError:
   from PySide2 import QtCore, QtGui, QtWidgets
 
-import asset_browser.icons.icons
-import yaml
-from asset_browser.collapsable_frame import CollapsableFrame
-from asset_browser.flow_layout import FlowLayout
-from asset_browser.item import Item, Preset
+import asset_browser.client as client
+from asset_browser.catalogue import load_catalogue
+from asset_browser.model import AssetItem, AssetModel, AssetFilterModel
+from asset_browser.search import SearchIndex
+from asset_browser.thumbnails import ThumbnailStore
+from asset_browser.view import AssetView, CategoryPage
 from PySide6 import QtCore, QtGui, QtWidgets
 
 FILE_DIR = os.path.dirname(os.path.realpath(__file__))
-SEND_SNIPPET = os.path.join(FILE_DIR, "build_part_snippet.txt")
-EDIT_PRESET_SNIPPET = os.path.join(FILE_DIR, "edit_preset_snippet.txt")
-END_SNIPPET = os.path.join(FILE_DIR, "terminate_snippet.txt")
-BROWSER_LAYOUT_FILE = os.path.join(FILE_DIR, "..", "resources", "asset_data.yaml")
-NICE_NAMES_FILE = os.path.join(FILE_DIR, "..", "resources", "nice_names.json")
 STYLESHEET_FILE = os.path.join(FILE_DIR, "core.css")
 APP_ICON = os.path.join(FILE_DIR, "logo.png")
+ICON_PATH = os.path.join(FILE_DIR, "icons")
 USER_PATH = os.path.join(os.path.expanduser("~"), "NoMansSkyBaseBuilder")
+THUMBNAIL_PATH = os.path.join(USER_PATH, "thumbnails")
 PRESET_PATH = os.path.join(USER_PATH, "presets")
-
-with open(NICE_NAMES_FILE, "r") as stream:
-    NICE_NAME_DATA = json.load(stream)
+UNCATEGORIZED_PRESETS = "Uncategorized Presets"
+# Milliseconds to wait after the last key press before searching.
+SEARCH_DELAY = 150
+# Milliseconds to wait for a burst of preset file changes to finish.
+PRESET_SYNC_DELAY = 200
 
 
 class AssetBrowser(QtWidgets.QMainWindow):
-    def __init__(self, *args, **kwargs):
+    def __init__(self, port=None, token=None, *args, **kwargs):
         super(AssetBrowser, self).__init__(*args, **kwargs)
+        # The port Blender listens for commands on.
+        self.port = port
+        # Sent with every command, so Blender knows it came from us.
+        self.token = token
         self.setWindowTitle("No Man's Sky Base Builder :: Asset Browser")
         self.setWindowFlags(QtCore.Qt.Window | QtCore.Qt.WindowStaysOnTopHint)
         app_id = u"djmonkey.NMSBB.AssetBrowser.1"  # arbitrary string
@@ -46,8 +44,24 @@ class AssetBrowser(QtWidgets.QMainWindow):
             ctypes.windll.shell32.SetCurrentProcessExplicitAppUserModelID(app_id)
         self.setWindowTitle("No Man's Sky Blender Builder - Asset Browser")
         self.setWindowIcon(QtGui.QIcon(APP_ICON))
-        self.__search_buttons = []
-        self.__preset_search_buttons = []
+        self.catalogue = load_catalogue()
+        self.thumbnail_store = ThumbnailStore(
+            ICON_PATH,
+            THUMBNAIL_PATH,
+            sources=self.catalogue["icons"],
+            placeholder_path=APP_ICON,
+            parent=self
+        )
+        self.part_model = AssetModel(
+            thumbnail_store=self.thumbnail_store, parent=self
+        )
+        self.preset_model = AssetModel(parent=self)
+        self.part_index = SearchIndex()
+        self.preset_index = SearchIndex()
+        # Preset folder -> file name -> AssetItem.
+        self.__preset_items = {}
+        # Preset folders changed since the last sync.
+        self.__changed_preset_folders = set()
         self._build_ui()
         self._layout_ui()
         self._setup_ui()
@@ -67,270 +81,251 @@ class AssetBrowser(QtWidgets.QMainWindow):
         self.top_bar_layout.setContentsMargins(0, 0, 0, 0)
         self.search_lineedit = QtWidgets.QLineEdit(self.top_bar_frame)
         self.search_lineedit.setPlaceholderText("Search...")
-        self.refresh_presets_button = QtWidgets.QPushButton(self.top_bar_frame)
-        self.refresh_presets_button.setIcon(QtGui.QIcon(":TOP_BAR_REFRESH"))
-        self.refresh_presets_button.setObjectName("refresh_button")
-        self.refresh_presets_button.setCursor(
-            QtGui.QCursor(QtCore.Qt.PointingHandCursor)
-        )
-        self.refresh_presets_button.setToolTip("Refresh Presets")
+        self.search_timer = QtCore.QTimer(self)
+        self.search_timer.setSingleShot(True)
+        self.search_timer.setInterval(SEARCH_DELAY)
+
+        # Presets
+        self.preset_watcher = QtCore.QFileSystemWatcher(self)
+        self.preset_sync_timer = QtCore.QTimer(self)
+        self.preset_sync_timer.setSingleShot(True)
+        self.preset_sync_timer.setInterval(PRESET_SYNC_DELAY)
 
         # Tab widget
         self.tab_widget = QtWidgets.QTabWidget(self.main_widget)
 
-        self.search_scroll = QtWidgets.QScrollArea(self.main_widget)
-        self.search_scroll.setWidgetResizable(True)
-        self.search_scroll.setVisible(False)
-
-        self.search_tab_widget = QtWidgets.QTabWidget(self.search_scroll)
-        self.search_scroll.setWidget(self.search_tab_widget)
-
-        # Search Parts
-        self.search_parts_scroll = QtWidgets.QScrollArea(self.search_tab_widget)
-        self.search_parts_scroll.setWidgetResizable(True)
-        self.search_parts_frame = QtWidgets.QFrame(self.search_parts_scroll)
-        self.search_frame_layout = FlowLayout(parent=self.search_parts_frame)
-        self.search_parts_scroll.setWidget(self.search_parts_frame)
-        self.search_tab_widget.addTab(self.search_parts_scroll, "Parts")
-
-        # Search presets
-        self.search_presets_scroll = QtWidgets.QScrollArea(self.search_tab_widget)
-        self.search_presets_scroll.setWidgetResizable(True)
-        self.search_presets_frame = QtWidgets.QFrame(self.search_presets_scroll)
-        self.search_presets_layout = QtWidgets.QVBoxLayout(self.search_presets_frame)
-        self.search_presets_layout.setAlignment(QtCore.Qt.AlignTop)
-        self.search_presets_scroll.setWidget(self.search_presets_frame)
-        self.search_tab_widget.addTab(self.search_presets_scroll, "Presets")
+        # Search
+        self.search_tab_widget = QtWidgets.QTabWidget(self.main_widget)
+        self.search_tab_widget.setVisible(False)
+        self.search_parts_model = AssetFilterModel(parent=self)
+        self.search_parts_model.setSourceModel(self.part_model)
+        self.search_parts_view = AssetView(parent=self.search_tab_widget)
+        self.search_parts_view.setModel(self.search_parts_model)
+        self.search_tab_widget.addTab(self.search_parts_view, "Parts")
+
+        self.search_presets_model = AssetFilterModel(parent=self)
+        self.search_presets_model.setSourceModel(self.preset_model)
+        self.search_presets_view = AssetView(
+            presets=True, parent=self.search_tab_widget
+        )
+        self.search_presets_view.setModel(self.search_presets_model)
+        self.search_tab_widget.addTab(self.search_presets_view, "Presets")
 
     def refresh_search(self):
         search = self.search_lineedit.text()
         if search:
             self.tab_widget.setVisible(False)
-            self.search_scroll.setVisible(True)
-            for array in [self.__search_buttons, self.__preset_search_buttons]:
-                for button in array:
-                    if (
-                        search.lower() in button.item_id.lower()
-                        or search.lower() in button.label.lower()
-                    ):
-                        button.setVisible(True)
-                    else:
-                        button.setVisible(False)
+            self.search_tab_widget.setVisible(True)
+            self.search_parts_model.set_matches(self.part_index.search(search))
+            self.search_presets_model.set_matches(
+                self.preset_index.search(search)
+            )
         else:
             self.tab_widget.setVisible(True)
-            self.search_scroll.setVisible(False)
+            self.search_tab_widget.setVisible(False)
 
     def generate_contents(self):
-        with open(BROWSER_LAYOUT_FILE, "r") as stream:
-            browser_data = yaml.safe_load(stream)
-
         # Add Categories
-        for category_data in browser_data:
-            for category, sub_category_data in category_data.items():
-                scroll_frame = QtWidgets.QScrollArea(self)
-                scroll_frame.setWidgetResizable(True)
-                frame = QtWidgets.QFrame(scroll_frame)
-                scroll_frame.setWidget(frame)
-                layout = QtWidgets.QVBoxLayout(frame)
-                layout.setAlignment(QtCore.Qt.AlignTop)
-                self.tab_widget.addTab(scroll_frame, category)
-                if not sub_category_data:
-                    continue
-                for data in sub_category_data:
-                    for sub_category_title, items in data.items():
-                        title_label = CollapsableFrame(
-                            label=sub_category_title, parent=frame
+        nice_names = self.catalogue["nice_names"]
+        items = []
+        for category, sub_category_data in self.catalogue["layout"]:
+            page = CategoryPage(self.part_model, category=category, parent=self)
+            page.itemClicked.connect(self.send_part_command_to_blender)
+            self.tab_widget.addTab(page, category)
+            sub_categories = []
+            for sub_category, part_ids in sub_category_data:
+                sub_categories.append(sub_category)
+                for part_id in part_ids:
+                    items.append(
+                        AssetItem(
+                            item_id=part_id,
+                            label=nice_names.get(part_id, part_id),
+                            category=category,
+                            sub_category=sub_category
                         )
-                        layout.addWidget(title_label)
-                        if not items:
-                            continue
-                        for item in items:
-                            if isinstance(item, str):
-                                # Add to tab.
-                                item_widget = Item(
-                                    item_id=item,
-                                    label=NICE_NAME_DATA.get(item, item),
-                                    parent=title_label,
-                                )
-                                title_label.addWidget(item_widget)
-                                item_widget.clicked.connect(
-                                    partial(self.send_part_command_to_blender, item)
-                                )
-                                # Add to search frame.
-                                search_item_widget = Item(
-                                    item_id=item,
-                                    label=NICE_NAME_DATA.get(item, item),
-                                    parent=title_label,
-                                )
-                                self.search_frame_layout.addWidget(search_item_widget)
-                                search_item_widget.clicked.connect(
-                                    partial(self.send_part_command_to_blender, item)
-                                )
-                                self.__search_buttons.append(search_item_widget)
-
-        # Add Presets.
-        scroll_frame = QtWidgets.QScrollArea(self)
-        scroll_frame.setWidgetResizable(True)
-        self.presets_frame = QtWidgets.QFrame(scroll_frame)
-        scroll_frame.setWidget(self.presets_frame)
-        self.presets_layout = QtWidgets.QVBoxLayout(self.presets_frame)
-        self.presets_layout.setAlignment(QtCore.Qt.AlignTop)
-        self.tab_widget.addTab(scroll_frame, "Presets")
-        self.generate_presets()
-
-    def clear_presets(self):
-        for widget in self.__preset_search_buttons:
-            widget.parent().layout().removeWidget(widget)
-            widget.deleteLater()
-        for _ in range(self.presets_layout.count()):
-            item = self.presets_layout.itemAt(0)
-            widget = item.widget()
-            if widget and isinstance(widget, CollapsableFrame):
-                self.presets_layout.removeWidget(widget)
-                widget.deleteLater()
-        self.__preset_search_buttons = []
-
-    def generate_presets(self):
-        self.__preset_search_buttons = []
-        # Add Categories.
-        categories = sorted(os.listdir(PRESET_PATH))
-        for category in categories:
-            full_path = os.path.join(PRESET_PATH, category)
-            if os.path.isdir(full_path):
-                preset_category_frame = CollapsableFrame(
-                    label=category, layout="vertical", parent=self.presets_frame
-                )
-                self.presets_layout.addWidget(preset_category_frame)
-                presets = os.listdir(full_path)
-                for preset in presets:
-                    self.add_preset_to_frame(preset, preset_category_frame)
-
-        # Add un-categorized presets.
-        presets = sorted(os.listdir(PRESET_PATH))
-        presets = [item for item in presets if os.path.isfile(os.path.join(PRESET_PATH, item))]
-        if presets:
-            preset_category_frame = CollapsableFrame(
-                label="Uncategorized Presets", layout="vertical", parent=self.presets_frame
+                    )
+            page.set_sub_categories(sub_categories)
+        self.part_model.set_items(items)
+        self.part_index.clear()
+        for item in items:
+            self.part_index.add(
+                item.item_id,
+                [item.item_id, item.label, item.category, item.sub_category]
             )
-            self.presets_layout.addWidget(preset_category_frame)
-            for preset in presets:
-                self.add_preset_to_frame(preset, preset_category_frame)
 
-    def add_preset_to_frame(self, preset, frame):
+        # Add Presets.
+        self.presets_page = CategoryPage(
+            self.preset_model, presets=True, parent=self
+        )
+        self.presets_page.itemClicked.connect(self.send_part_command_to_blender)
+        self.presets_page.editClicked.connect(
+            self.send_edit_preset_command_to_blender
+        )
+        self.tab_widget.addTab(self.presets_page, "Presets")
+        if not os.path.exists(PRESET_PATH):
+            os.makedirs(PRESET_PATH)
+        self.preset_watcher.addPath(PRESET_PATH)
+        self.sync_preset_folder(PRESET_PATH)
+        self.update_preset_categories()
+
+    @staticmethod
+    def create_preset_item(preset, category):
         item_id = preset.split(".")[0]
         if not item_id:
-            return
+            return None
         nice_label = item_id.replace("_", " ").title()
-        # Add preset
-        item_widget = Preset(
-            item_id=item_id, label=nice_label, parent=frame
+        return AssetItem(
+            item_id=item_id, label=nice_label, sub_category=category
         )
-        frame.addWidget(item_widget)
-        item_widget.clicked.connect(
-            partial(self.send_part_command_to_blender, item_id)
-        )
-        item_widget.editClicked.connect(
-            partial(self.send_edit_preset_command_to_blender, item_id)
-        )
-        # Add to search
-        search_item_widget = Preset(
-            item_id=item_id, label=nice_label, parent=self.search_presets_frame
-        )
-        self.search_presets_layout.addWidget(search_item_widget)
-        search_item_widget.clicked.connect(
-            partial(self.send_part_command_to_blender, item_id)
-        )
-        search_item_widget.editClicked.connect(
-            partial(self.send_edit_preset_command_to_blender, item_id)
+
+    def queue_preset_sync(self, folder_path):
+        self.__changed_preset_folders.add(os.path.normpath(folder_path))
+        self.preset_sync_timer.start()
+
+    def sync_presets(self):
+        """Bring the preset items up to date with the folders that changed."""
+        folders = self.__changed_preset_folders
+        self.__changed_preset_folders = set()
+        for folder_path in sorted(folders):
+            self.sync_preset_folder(folder_path)
+        self.update_preset_categories()
+        if self.search_lineedit.text():
+            self.refresh_search()
+
+    def remove_preset_items(self, items):
+        self.preset_model.remove_items(items)
+        for item in items:
+            # The same preset name can be in more than one category.
+            if not self.preset_model.has_item_id(item.item_id):
+                self.preset_index.remove(item.item_id)
+
+    def add_preset_items(self, items):
+        self.preset_model.add_items(items)
+        for item in items:
+            self.preset_index.add(
+                item.item_id, [item.item_id, item.label, item.sub_category]
+            )
+
+    def sync_preset_folder(self, folder_path):
+        """Add and remove the preset items of one folder to match its files.
+
+        Args:
+            folder_path (str): The preset folder, or one of its categories.
+        """
+        folder_path = os.path.normpath(folder_path)
+        is_root = folder_path == os.path.normpath(PRESET_PATH)
+        current = self.__preset_items.get(folder_path, {})
+        try:
+            listing = os.listdir(folder_path)
+        except OSError:
+            # The category was removed or renamed.
+            self.remove_preset_items(list(current.values()))
+            self.__preset_items.pop(folder_path, None)
+            self.preset_watcher.removePath(folder_path)
+            return
+
+        if is_root:
+            category = UNCATEGORIZED_PRESETS
+            sub_folders = set()
+            presets = set()
+            for name in listing:
+                full_path = os.path.join(folder_path, name)
+                if os.path.isdir(full_path):
+                    sub_folders.add(full_path)
+                else:
+                    presets.add(name)
+        else:
+            category = os.path.basename(folder_path)
+            presets = set(listing)
+
+        removed = [current.pop(name) for name in set(current) - presets]
+        added = []
+        for name in presets - set(current):
+            item = self.create_preset_item(name, category)
+            if item:
+                current[name] = item
+                added.append(item)
+        self.__preset_items[folder_path] = current
+        self.remove_preset_items(removed)
+        self.add_preset_items(added)
+
+        if is_root:
+            for sub_folder in sub_folders:
+                if sub_folder not in self.__preset_items:
+                    self.preset_watcher.addPath(sub_folder)
+                    self.sync_preset_folder(sub_folder)
+            for sub_folder in list(self.__preset_items):
+                if sub_folder != folder_path and sub_folder not in sub_folders:
+                    self.sync_preset_folder(sub_folder)
+
+    def update_preset_categories(self):
+        root_path = os.path.normpath(PRESET_PATH)
+        sub_categories = sorted(
+            os.path.basename(folder_path) for folder_path in self.__preset_items
+            if folder_path != root_path
         )
-        self.__preset_search_buttons.append(search_item_widget)
+        if self.__preset_items.get(root_path, None):
+            sub_categories.append(UNCATEGORIZED_PRESETS)
+        self.presets_page.set_sub_categories(sub_categories)
 
     def _layout_ui(self):
         self.setCentralWidget(self.main_widget)
         self.main_layout.addWidget(self.top_bar_frame)
         self.top_bar_layout.addWidget(self.search_lineedit)
-        self.top_bar_layout.addWidget(self.refresh_presets_button)
         self.main_layout.addWidget(self.tab_widget)
-        self.main_layout.addWidget(self.search_scroll)
+        self.main_layout.addWidget(self.search_tab_widget)
 
     def _setup_ui(self):
-        self.search_lineedit.textChanged.connect(self.refresh_search)
-        self.refresh_presets_button.clicked.connect(self.refresh_presets)
-        self.tab_widget.currentChanged.connect(self.refresh_layouts)
-
-    def refresh_layouts(self, tab_index):
-        scroll_widget = self.tab_widget.currentWidget()
-        widget = scroll_widget.widget()
-        layout = widget.layout()
-        for idx in range(layout.count()):
-            frame_item = layout.itemAt(idx)
-            frame = frame_item.widget()
-            if isinstance(frame, CollapsableFrame):
-                frame.inner_frame_layout.update()
-
-    def refresh_presets(self):
-        self.clear_presets()
-        self.generate_presets()
-        self.refresh_search()
+        # Search once typing pauses rather than on every key press.
+        self.search_lineedit.textChanged.connect(self.search_timer.start)
+        self.search_timer.timeout.connect(self.refresh_search)
+        # Presets update themselves as their files change.
+        self.preset_watcher.directoryChanged.connect(self.queue_preset_sync)
+        self.preset_sync_timer.timeout.connect(self.sync_presets)
+        self.search_parts_view.itemClicked.connect(
+            self.send_part_command_to_blender
+        )
+        self.search_presets_view.itemClicked.connect(
+            self.send_part_command_to_blender
+        )
+        self.search_presets_view.editClicked.connect(
+            self.send_edit_preset_command_to_blender
+        )
 
     def apply_style(self):
         with open(STYLESHEET_FILE) as stream:
             self.setStyleSheet(stream.read())
 
-    def send_part_command_to_blender(self, item_id):
-        PYTHON_FILE = os.path.join(tempfile.gettempdir(), "command_script.py")
-
-        script_contents = ""
-        with open(SEND_SNIPPET, "r") as stream:
-            script_contents = stream.read()
-
-        with open(PYTHON_FILE, "w") as stream:
-            stream.write(script_contents.format(item_id))
+    def send_commands_to_blender(self, commands):
+        if self.port is None:
+            return
+        if not client.send_commands(self.port, commands, token=self.token):
+            print("Couldn't reach Blender on port {0}.".format(self.port))
 
-        TEMP_PATH = os.path.join(tempfile.gettempdir(), "bpy_external.io")
-        with open(TEMP_PATH, "w") as stream:
-            stream.write(PYTHON_FILE)
+    def send_part_command_to_blender(self, item_id):
+        self.send_commands_to_blender(
+            {"command": "build_part", "part_id": item_id}
+        )
 
     def send_edit_preset_command_to_blender(self, item_id):
-        PYTHON_FILE = os.path.join(tempfile.gettempdir(), "command_script.py")
-
-        script_contents = ""
-        with open(EDIT_PRESET_SNIPPET, "r") as stream:
-            script_contents = stream.read()
-
-        with open(PYTHON_FILE, "w") as stream:
-            stream.write(script_contents.format(item_id))
-
-        TEMP_PATH = os.path.join(tempfile.gettempdir(), "bpy_external.io")
-        with open(TEMP_PATH, "w") as stream:
-            stream.write(PYTHON_FILE)
+        self.send_commands_to_blender(
+            {"command": "edit_preset", "preset_id": item_id}
+        )
 
     def sizeHint(self):
         return QtCore.QSize(1000, 1000)
 
     def closeEvent(self, event):
-        PYTHON_FILE = os.path.join(tempfile.gettempdir(), "command_script.py")
-        script_contents = ""
-        with open(END_SNIPPET, "r") as stream:
-            script_contents = stream.read()
-        with open(PYTHON_FILE, "w") as stream:
-            stream.write(script_contents)
-
-        TEMP_PATH = os.path.join(tempfile.gettempdir(), "bpy_external.io")
-        with open(TEMP_PATH, "w") as stream:
-            stream.write(PYTHON_FILE)
-
-        time.sleep(0.5)
-        with open(TEMP_PATH, "w") as stream:
-            stream.write("")
+        self.send_commands_to_blender({"command": "close"})
+        self.thumbnail_store.save_index()
 
         # Close
         super(AssetBrowser, self).closeEvent(event)
 
 
-def load():
+def load(port=None, token=None):
     app = QtWidgets.QApplication(sys.argv)
     app.setStyle("Fusion")
-    window = AssetBrowser()
+    window = AssetBrowser(port=port, token=token)
     window.show()
     app.exit(app.exec_())
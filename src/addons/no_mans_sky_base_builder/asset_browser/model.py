@@ -0,0 +1,179 @@
+"""Item models behind the asset browser views.
+
+Every part and preset is a row in a list model instead of a widget of its
+own. The views only ask the model for the rows they are showing, so
+thumbnails are only requested once a part scrolls into view.
+"""
+try:
+  from PySide6 import QtCore
+except ImportError:
+  from PySide2 import QtCore
+
+# Custom data roles.
+ITEM_ID_ROLE = QtCore.Qt.UserRole + 1
+CATEGORY_ROLE = QtCore.Qt.UserRole + 2
+SUB_CATEGORY_ROLE = QtCore.Qt.UserRole + 3
+
+
+class AssetItem(object):
+
+    __slots__ = ("item_id", "label", "category", "sub_category")
+
+    def __init__(self, item_id, label, category=None, sub_category=None):
+        """AssetItem __init__
+
+        Args:
+            item_id (str): The part or preset ID sent to Blender.
+            label (str): The name shown under the thumbnail.
+            category (str): The tab the item belongs to.
+            sub_category (str): The group inside the tab.
+        """
+        self.item_id = item_id
+        self.label = label
+        self.category = category
+        self.sub_category = sub_category
+
+
+class AssetModel(QtCore.QAbstractListModel):
+
+    def __init__(self, thumbnail_store=None, parent=None):
+        """AssetModel __init__
+
+        Args:
+            thumbnail_store (ThumbnailStore): Provides the thumbnail of each
+                item, or None for items without thumbnails.
+        """
+        super(AssetModel, self).__init__(parent)
+        self.thumbnail_store = thumbnail_store
+        self.__items = []
+        # Item ID -> rows showing it.
+        self.__rows = {}
+        if thumbnail_store:
+            thumbnail_store.thumbnailLoaded.connect(self.refresh_thumbnail)
+
+    def rowCount(self, parent=QtCore.QModelIndex()):
+        if parent.isValid():
+            return 0
+        return len(self.__items)
+
+    def item(self, row):
+        """Get the AssetItem of a row."""
+        return self.__items[row]
+
+    def items(self):
+        """Get every AssetItem, in row order."""
+        return list(self.__items)
+
+    def set_items(self, items):
+        """Replace every row of the model.
+
+        Args:
+            items (list): The AssetItem of each row.
+        """
+        self.beginResetModel()
+        self.__items = list(items)
+        self.update_rows()
+        self.endResetModel()
+
+    def has_item_id(self, item_id):
+        """Check if any row shows an item ID."""
+        return item_id in self.__rows
+
+    def update_rows(self):
+        self.__rows = {}
+        for row, item in enumerate(self.__items):
+            self.__rows.setdefault(item.item_id, []).append(row)
+
+    def add_items(self, items):
+        """Add rows to the end of the model.
+
+        Args:
+            items (list): The AssetItem of each new row.
+        """
+        if not items:
+            return
+        first = len(self.__items)
+        self.beginInsertRows(QtCore.QModelIndex(), first, first + len(items) - 1)
+        self.__items.extend(items)
+        self.update_rows()
+        self.endInsertRows()
+
+    def remove_items(self, items):
+        """Remove the rows of some items from the model.
+
+        Args:
+            items (list): The AssetItems to remove.
+        """
+        removed = set(id(item) for item in items)
+        rows = [
+            row for row, item in enumerate(self.__items) if id(item) in removed
+        ]
+        # Remove from the end so the earlier row numbers stay valid.
+        for row in reversed(rows):
+            self.beginRemoveRows(QtCore.QModelIndex(), row, row)
+            del self.__items[row]
+            self.endRemoveRows()
+        self.update_rows()
+
+    def refresh_thumbnail(self, item_id):
+        """Redraw the rows of an item once its thumbnail has loaded."""
+        for row in self.__rows.get(item_id, []):
+            index = self.index(row)
+            self.dataChanged.emit(index, index, [QtCore.Qt.DecorationRole])
+
+    def data(self, index, role=QtCore.Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        item = self.__items[index.row()]
+        if role == QtCore.Qt.DisplayRole:
+            return item.label
+        if role == QtCore.Qt.ToolTipRole or role == ITEM_ID_ROLE:
+            return item.item_id
+        if role == QtCore.Qt.DecorationRole and self.thumbnail_store:
+            return self.thumbnail_store.get(item.item_id)
+        if role == CATEGORY_ROLE:
+            return item.category
+        if role == SUB_CATEGORY_ROLE:
+            return item.sub_category
+        return None
+
+
+class AssetFilterModel(QtCore.QSortFilterProxyModel):
+
+    def __init__(self, category=None, parent=None):
+        """AssetFilterModel __init__
+
+        Args:
+            category (str): Only show items in this category, or all items
+                if None.
+        """
+        super(AssetFilterModel, self).__init__(parent)
+        self.category = category
+        self.sub_category = None
+        # The item IDs found by a search, None when not searching.
+        self.matches = None
+
+    def set_sub_category(self, sub_category):
+        """Only show items in a sub category, or the whole category if None."""
+        self.sub_category = sub_category
+        self.invalidateFilter()
+
+    def set_matches(self, matches):
+        """Only show the items found by a search.
+
+        Args:
+            matches (set): The item IDs to show, or None to show every item.
+        """
+        self.matches = matches
+        self.invalidateFilter()
+
+    def filterAcceptsRow(self, source_row, source_parent):
+        item = self.sourceModel().item(source_row)
+        if self.category is not None and item.category != self.category:
+            return False
+        if self.sub_category is not None:
+            if item.sub_category != self.sub_category:
+                return False
+        if self.matches is not None:
+            return item.item_id in self.matches
+        return True
@@ -0,0 +1,100 @@
+"""An n-gram index for searching the asset browser items.
+
+Each item is indexed by every 1, 2 and 3 character sequence in its ID, nice
+name and categories. A search term looks up its own n-grams and intersects
+them, so only a handful of candidates have to be checked with a substring
+test instead of every item in the browser.
+"""
+from collections import defaultdict
+
+GRAM_SIZE = 3
+
+
+def get_grams(text):
+    """Get every sequence of up to GRAM_SIZE characters in the text."""
+    grams = set()
+    for size in range(1, GRAM_SIZE + 1):
+        for index in range(len(text) - size + 1):
+            grams.add(text[index:index + size])
+    return grams
+
+
+class SearchIndex(object):
+
+    def __init__(self):
+        """SearchIndex __init__."""
+        # N-gram -> keys of the items containing it.
+        self.__grams = defaultdict(set)
+        # Key -> the lowercase texts it was indexed by.
+        self.__texts = {}
+
+    def __len__(self):
+        return len(self.__texts)
+
+    def clear(self):
+        self.__grams.clear()
+        self.__texts.clear()
+
+    def add(self, key, texts):
+        """Index an item.
+
+        Args:
+            key (str): The item ID returned by searches.
+            texts (list): The strings the item can be found by.
+        """
+        self.remove(key)
+        texts = [text.lower() for text in texts if text]
+        self.__texts[key] = texts
+        for text in texts:
+            for gram in get_grams(text):
+                self.__grams[gram].add(key)
+
+    def remove(self, key):
+        """Remove an item from the index."""
+        texts = self.__texts.pop(key, None)
+        if texts is None:
+            return
+        for text in texts:
+            for gram in get_grams(text):
+                keys = self.__grams.get(gram, None)
+                if keys is None:
+                    continue
+                keys.discard(key)
+                if not keys:
+                    del self.__grams[gram]
+
+    def find_term(self, term):
+        """Get the keys with a text containing the term."""
+        if len(term) <= GRAM_SIZE:
+            return set(self.__grams.get(term, ()))
+
+        # Every n-gram of the term has to be in the text.
+        candidates = None
+        for index in range(len(term) - GRAM_SIZE + 1):
+            keys = self.__grams.get(term[index:index + GRAM_SIZE], None)
+            if not keys:
+                return set()
+            candidates = set(keys) if candidates is None else candidates & keys
+        # The n-grams may be spread over the text, check the whole term.
+        return {
+            key for key in candidates
+            if any(term in text for text in self.__texts[key])
+        }
+
+    def search(self, text):
+        """Find the items matching every word of the search text.
+
+        Returns:
+            set: The matching keys, or None if the search is empty.
+        """
+        terms = text.lower().split()
+        if not terms:
+            return None
+        # Look up the longest terms first, they have the fewest matches.
+        terms.sort(key=len, reverse=True)
+        matches = self.find_term(terms[0])
+        for term in terms[1:]:
+            if not matches:
+                break
+            matches &= self.find_term(term)
+        return matches
@@ -0,0 +1,205 @@
+"""Part thumbnails loaded on demand.
+
+The part icons are plain PNG files in the icons folder. The first time a
+thumbnail is shown it is scaled down on a worker thread and saved into a
+thumbnail cache folder, along with an index of the source file's mtime, so
+later sessions only read the small pre-scaled file. Decoded thumbnails are
+kept in the QPixmapCache, which drops the least recently used ones once it
+is full. A placeholder is shown until a thumbnail is ready.
+
+New parts only need their PNG dropped into the icons folder.
+"""
+import json
+import os
+
+try:
+  from PySide6 import QtCore, QtGui
+except ImportError:
+  from PySide2 import QtCore, QtGui
+
+THUMB_SIZE = 55
+# Kilobytes of decoded thumbnails kept in memory.
+PIXMAP_CACHE_LIMIT = 16 * 1024
+INDEX_FILE = "index.json"
+KEY_PREFIX = "nms_thumb:"
+
+
+class ThumbnailSignals(QtCore.QObject):
+
+    # Item ID, the scaled image and the mtime of its source file.
+    loaded = QtCore.Signal(str, QtGui.QImage, float)
+
+
+class ThumbnailLoader(QtCore.QRunnable):
+    """Read and scale one thumbnail off the main thread."""
+
+    def __init__(self, signals, item_id, source_path, cache_path, cached_mtime):
+        """ThumbnailLoader __init__
+
+        Args:
+            signals (ThumbnailSignals): Reports the result to the main thread.
+            item_id (str): The part ID.
+            source_path (str): The full size icon.
+            cache_path (str): Where the scaled thumbnail is stored.
+            cached_mtime (float): The source mtime when the scaled thumbnail
+                was saved, or None if there is none.
+        """
+        super(ThumbnailLoader, self).__init__()
+        self.signals = signals
+        self.item_id = item_id
+        self.source_path = source_path
+        self.cache_path = cache_path
+        self.cached_mtime = cached_mtime
+
+    def run(self):
+        try:
+            mtime = os.stat(self.source_path).st_mtime
+        except OSError:
+            self.signals.loaded.emit(self.item_id, QtGui.QImage(), 0.0)
+            return
+
+        # QImage can be used outside the main thread, QPixmap can't.
+        if mtime == self.cached_mtime:
+            image = QtGui.QImage(self.cache_path)
+            if not image.isNull():
+                self.signals.loaded.emit(self.item_id, image, mtime)
+                return
+
+        image = QtGui.QImage(self.source_path)
+        if not image.isNull():
+            image = image.scaled(
+                THUMB_SIZE,
+                THUMB_SIZE,
+                QtCore.Qt.KeepAspectRatio,
+                QtCore.Qt.SmoothTransformation
+            )
+            image.save(self.cache_path, "PNG")
+        self.signals.loaded.emit(self.item_id, image, mtime)
+
+
+class ThumbnailStore(QtCore.QObject):
+
+    thumbnailLoaded = QtCore.Signal(str)
+
+    def __init__(
+        self,
+        icon_path,
+        cache_path,
+        sources=None,
+        placeholder_path=None,
+        parent=None
+    ):
+        """ThumbnailStore __init__
+
+        Args:
+            icon_path (str): The folder of full size part icons.
+            cache_path (str): The folder scaled thumbnails are kept in.
+            sources (dict): The icon file name of each part ID, if known.
+                Otherwise the icon folder is listed.
+            placeholder_path (str): An image shown while loading.
+        """
+        super(ThumbnailStore, self).__init__(parent)
+        self.icon_path = icon_path
+        self.cache_path = cache_path
+        QtGui.QPixmapCache.setCacheLimit(PIXMAP_CACHE_LIMIT)
+
+        # Part ID -> icon file name.
+        self.__sources = dict(sources or {})
+        if sources is None and os.path.isdir(icon_path):
+            for file_name in os.listdir(icon_path):
+                stem, extension = os.path.splitext(file_name)
+                if extension.lower() == ".png":
+                    self.__sources[stem] = file_name
+
+        # Part ID -> source mtime of the scaled thumbnail on disk.
+        self.__index = {}
+        self.__index_changed = False
+        self.load_index()
+
+        self.__pending = set()
+        self.__missing = set()
+        self.signals = ThumbnailSignals(self)
+        self.signals.loaded.connect(self.on_loaded)
+        self.pool = QtCore.QThreadPool(self)
+
+        self.placeholder = None
+        if placeholder_path:
+            placeholder = QtGui.QPixmap(placeholder_path)
+            if not placeholder.isNull():
+                self.placeholder = placeholder.scaled(
+                    THUMB_SIZE // 2,
+                    THUMB_SIZE // 2,
+                    QtCore.Qt.KeepAspectRatio,
+                    QtCore.Qt.SmoothTransformation
+                )
+
+    def load_index(self):
+        index_path = os.path.join(self.cache_path, INDEX_FILE)
+        try:
+            with open(index_path, "r") as stream:
+                self.__index = json.load(stream)
+        except (OSError, ValueError):
+            self.__index = {}
+
+    def save_index(self):
+        """Write the thumbnail index if new thumbnails were cached."""
+        if not self.__index_changed:
+            return
+        index_path = os.path.join(self.cache_path, INDEX_FILE)
+        try:
+            with open(index_path, "w") as stream:
+                json.dump(self.__index, stream)
+        except OSError:
+            return
+        self.__index_changed = False
+
+    def get_icon_path(self, item_id):
+        """Get the full size icon of a part, None if it has none."""
+        file_name = self.__sources.get(item_id, None)
+        if not file_name:
+            return None
+        return os.path.join(self.icon_path, file_name)
+
+    def get(self, item_id):
+        """Get the thumbnail of a part, starting to load it if needed.
+
+        Returns:
+            QtGui.QPixmap: The thumbnail, the placeholder while it loads, or
+                None if the part has no icon.
+        """
+        pixmap = QtGui.QPixmapCache.find(KEY_PREFIX + item_id)
+        if pixmap and not pixmap.isNull():
+            return pixmap
+        if item_id in self.__missing:
+            return None
+        source_path = self.get_icon_path(item_id)
+        if not source_path:
+            self.__missing.add(item_id)
+            return None
+        if item_id not in self.__pending:
+            self.__pending.add(item_id)
+            if not os.path.exists(self.cache_path):
+                os.makedirs(self.cache_path)
+            self.pool.start(
+                ThumbnailLoader(
+                    self.signals,
+                    item_id,
+                    source_path,
+                    os.path.join(self.cache_path, item_id + ".png"),
+                    self.__index.get(item_id, None)
+                )
+            )
+        return self.placeholder
+
+    def on_loaded(self, item_id, image, mtime):
+        self.__pending.discard(item_id)
+        if image.isNull():
+            self.__missing.add(item_id)
+        else:
+            QtGui.QPixmapCache.insert(
+                KEY_PREFIX + item_id, QtGui.QPixmap.fromImage(image)
+            )
+            if self.__index.get(item_id, None) != mtime:
+                self.__index[item_id] = mtime
+                self.__index_changed = True
+        self.thumbnailLoaded.emit(item_id)
@@ -1,25 +1,13 @@
 import os
 
-import yaml
+from asset_browser.catalogue import load_catalogue
 
 
 def get_nice_ui_parts():
-    data = []
-    file_read = os.path.join(os.path.realpath(os.path.dirname(__file__)), "..", "resources/asset_data.yaml")
-    with open(file_read) as stream:
-        data = yaml.safe_load(stream)
-
     all_listed_items = []
-    for top_data in data:
-        for top, top_sub_data in top_data.items():
-            if not top_sub_data:
-                continue
-            for cat in top_sub_data:
-                print(cat)
-                for cat_name, items in cat.items():
-                    if not items:
-                        continue
-                    all_listed_items.extend(items)
+    for _, sub_category_data in load_catalogue()["layout"]:
+        for _, part_ids in sub_category_data:
+            all_listed_items.extend(part_ids)
     return all_listed_items
 
 def list_models():
@@ -78,26 +66,6 @@ def import_folder_into_maya():
         mesh = [x for x in post if x not in pre]
         cmds.rename(mesh[0], id)
 
-def write_qrc_contents():
-    folder_dir = os.path.dirname(os.path.realpath(__file__))
-    icons_dir = os.path.join(folder_dir, "icons")
-    file_path = os.path.join(folder_dir, "icons", "icons.qrc")
-
-    return_string = "<!DOCTYPE RCC><RCC version=\"1.0\">\n"
-    return_string += "<qresource>\n"
-    for part in get_nice_ui_parts():
-        if os.path.exists(os.path.join(icons_dir, part+".png")):
-            return_string += "    <file alias=\"{0}\">{0}.PNG</file>\n".format(part)
-    return_string += "    <file alias=\"TOP_BAR_REFRESH\">TOP_BAR_REFRESH.PNG</file>\n".format(part)
-    return_string += "</qresource>\n"
-    return_string += "</RCC>\n"
-
-    folder_dir = os.path.dirname(os.path.realpath(__file__))
-    file_path = os.path.join(folder_dir, "icons", "icons.qrc")
-    with open(file_path, "w") as stream:
-        stream.write(return_string)
-
-
 def list_unused_icons():
     folder_dir = os.path.dirname(os.path.realpath(__file__))
     icons_dir = os.path.join(folder_dir, "icons")
@@ -110,7 +78,7 @@ def list_unused_icons():
 def remove_unused_icons():
     folder_dir = os.path.dirname(os.path.realpath(__file__))
     icons_dir = os.path.join(folder_dir, "icons")
-    exclusions = ["icons.py", "icons.qrc", "TOP_BAR_REFRESH.png"]
+    exclusions = ["TOP_BAR_REFRESH.png"]
     for icon in list_unused_icons():
         if icon in exclusions:
             continue
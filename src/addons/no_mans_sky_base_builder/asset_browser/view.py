@@ -0,0 +1,111 @@
+try:
+  from PySide6 import QtCore, QtGui, QtWidgets
+except ImportError:
+  from PySide2 import QtCore, QtGui, QtWidgets
+
+from asset_browser.item import ItemDelegate, PresetDelegate
+from asset_browser.model import ITEM_ID_ROLE, AssetFilterModel
+
+ALL_LABEL = "All"
+# Rows laid out per pass, so large lists show up straight away.
+BATCH_SIZE = 200
+
+
+class AssetView(QtWidgets.QListView):
+    """Shows the rows of an asset model, parts as a grid of thumbnails."""
+
+    itemClicked = QtCore.Signal(str)
+    editClicked = QtCore.Signal(str)
+
+    def __init__(self, presets=False, *args, **kwargs):
+        super(AssetView, self).__init__(*args, **kwargs)
+        if presets:
+            self.setViewMode(QtWidgets.QListView.ListMode)
+            self.delegate = PresetDelegate(self)
+            self.delegate.clicked.connect(self.itemClicked.emit)
+            self.delegate.editClicked.connect(self.editClicked.emit)
+        else:
+            self.setViewMode(QtWidgets.QListView.IconMode)
+            self.delegate = ItemDelegate(self)
+            self.clicked.connect(self.emit_item_clicked)
+        self.setItemDelegate(self.delegate)
+        self.setSpacing(2)
+        self.setUniformItemSizes(True)
+        self.setMovement(QtWidgets.QListView.Static)
+        self.setResizeMode(QtWidgets.QListView.Adjust)
+        self.setLayoutMode(QtWidgets.QListView.Batched)
+        self.setBatchSize(BATCH_SIZE)
+        self.setSelectionMode(QtWidgets.QAbstractItemView.NoSelection)
+        self.setEditTriggers(QtWidgets.QAbstractItemView.NoEditTriggers)
+        self.setMouseTracking(True)
+        self.viewport().setCursor(QtGui.QCursor(QtCore.Qt.PointingHandCursor))
+
+    def emit_item_clicked(self, index):
+        self.itemClicked.emit(index.data(ITEM_ID_ROLE))
+
+
+class CategoryPage(QtWidgets.QFrame):
+    """A tab of the browser, a sub category list next to its items."""
+
+    itemClicked = QtCore.Signal(str)
+    editClicked = QtCore.Signal(str)
+
+    def __init__(self, model, category=None, presets=False, *args, **kwargs):
+        """CategoryPage __init__
+
+        Args:
+            model (AssetModel): The model holding the items.
+            category (str): The category shown on this page, or None to
+                show every item of the model.
+            presets (bool): Show the items as presets.
+        """
+        super(CategoryPage, self).__init__(*args, **kwargs)
+        self.main_layout = QtWidgets.QHBoxLayout(self)
+        self.main_layout.setContentsMargins(0, 0, 0, 0)
+
+        self.filter_model = AssetFilterModel(category=category, parent=self)
+        self.filter_model.setSourceModel(model)
+
+        self.sub_category_list = QtWidgets.QListWidget(self)
+        self.sub_category_list.setMaximumWidth(180)
+        self.view = AssetView(presets=presets, parent=self)
+        self.view.setModel(self.filter_model)
+        if presets:
+            # Presets are added as their files appear, keep them in order.
+            self.filter_model.setSortCaseSensitivity(QtCore.Qt.CaseInsensitive)
+            self.filter_model.sort(0)
+
+        self.main_layout.addWidget(self.sub_category_list)
+        self.main_layout.addWidget(self.view)
+
+        self.sub_category_list.currentTextChanged.connect(self.select_sub_category)
+        self.view.itemClicked.connect(self.itemClicked.emit)
+        self.view.editClicked.connect(self.editClicked.emit)
+
+    def set_sub_categories(self, sub_categories):
+        """Fill the sub category list, keeping the current choice if possible.
+
+        Args:
+            sub_categories (list): The sub category names, in display order.
+        """
+        current_item = self.sub_category_list.currentItem()
+        current = current_item.text() if current_item else ALL_LABEL
+        self.sub_category_list.blockSignals(True)
+        self.sub_category_list.clear()
+        self.sub_category_list.addItems([ALL_LABEL] + list(sub_categories))
+        matches = self.sub_category_list.findItems(
+            current, QtCore.Qt.MatchExactly
+        )
+        if matches:
+            self.sub_category_list.setCurrentItem(matches[0])
+        else:
+            self.sub_category_list.setCurrentRow(0)
+        self.sub_category_list.blockSignals(False)
+        self.select_sub_category(self.sub_category_list.currentItem().text())
+
+    def select_sub_category(self, sub_category):
+        if not sub_category:
+            return
+        self.filter_model.set_sub_category(
+            None if sub_category == ALL_LABEL else sub_category
+        )
@@ -5,10 +5,14 @@ import json
 import math
 import os
 import time
-from collections import defaultdict
+from collections import OrderedDict
 
 import bpy
+import mathutils
+import no_mans_sky_base_builder.line_rig as line_rig
 import no_mans_sky_base_builder.part as part
+import no_mans_sky_base_builder.part_library as part_library
+import no_mans_sky_base_builder.part_manifest as part_manifest
 import no_mans_sky_base_builder.part_overrides.air_lock_connector as air_lock_connector
 import no_mans_sky_base_builder.part_overrides.base_flag as base_flag
 import no_mans_sky_base_builder.part_overrides.bridge_connector as bridge_connector
@@ -23,7 +27,11 @@ import no_mans_sky_base_builder.part_overrides.u_pipeline as u_pipeline
 import no_mans_sky_base_builder.part_overrides.u_portalline as u_portalline
 import no_mans_sky_base_builder.part_overrides.u_powerline as u_powerline
 import no_mans_sky_base_builder.preset as preset
+import no_mans_sky_base_builder.registry as registry
+import no_mans_sky_base_builder.snapping as snapping
 import no_mans_sky_base_builder.utils.blend_utils as blend_utils
+import no_mans_sky_base_builder.utils.matrix as matrix_utils
+import no_mans_sky_base_builder.utils.spatial as spatial_utils
 import no_mans_sky_base_builder.utils.python as python_utils
 
 
@@ -34,11 +42,15 @@ class Builder(object):
     FILE_PATH = os.path.dirname(os.path.realpath(__file__))
     MODEL_PATH = os.path.join(FILE_PATH, "models")
     NICE_JSON = os.path.join(FILE_PATH, "resources", "nice_names.json")
+    PART_LIBRARY_PATH = os.path.join(FILE_PATH, "resources", "part_library.blend")
     MODS_PATH = os.path.join(USER_PATH, "mods")
     PRESET_PATH = os.path.join(USER_PATH, "presets")
+    PART_MANIFEST_PATH = os.path.join(USER_PATH, "part_manifest.json")
+    # Line controls closer than this are merged into one.
+    CONTROL_MERGE_DISTANCE = 0.001
 
-    # Load in nice name information.
-    nice_name_dictionary = python_utils.load_dictionary(NICE_JSON)
+    # Nice name information, read the first time a name is looked up.
+    nice_name_dictionary = python_utils.LazyDictionary(NICE_JSON)
 
     override_classes  = {
         "BASE_FLAG": base_flag.BASE_FLAG,
@@ -61,29 +73,81 @@ class Builder(object):
         # Part Cache.
         self.__part_cache = {}
         self.__preset_cache = {}
-
-        # Construct category and OBJ reference.
-        # Create default part pack.
-        self.available_packs = [("Parts", self.MODEL_PATH)]
-
-        # Find any mods with model packs inside.
-        if os.path.exists(self.MODS_PATH):
-            mod_folders = os.listdir(self.MODS_PATH)
-            for mod_folder in mod_folders:
-                full_mod_path = os.path.join(self.MODS_PATH, mod_folder)
-                if "models" in os.listdir(full_mod_path):
-                    full_model_path = os.path.join(
-                        self.MODS_PATH,
-                        mod_folder,
-                        "models"
-                    )
-                    self.available_packs.append((mod_folder, full_model_path))
-
-        # Find Parts and build a reference dictionary.
-        self.part_reference = {}
+        # Live index of the NMS objects in the scene.
+        self.registry = registry.SceneRegistry()
+        # World space snap points of the parts in the scene.
+        self.snap_points = snapping.SnapPointIndex(
+            self.registry,
+            self.get_snap_matrices
+        )
+        # Snap connectivity graphs keyed by snap point filter, along with
+        # the snap point index version they were built from.
+        self.__snap_graphs = {}
+        # Share one mesh between all parts with the same ObjectID.
+        self.use_instancing = True
+        # Rig lines with drivers, otherwise the line rig evaluator moves them.
+        self.use_line_drivers = True
+        self.line_rigs = line_rig.LineRigEvaluator(self.registry)
+        # Place presets as instances of a hidden collection.
+        self.use_preset_instancing = False
+        # Precompiled meshes for every part.
+        self.part_library = part_library.PartLibrary(self.PART_LIBRARY_PATH)
+        # Template objects used while batch importing.
+        self.__batch_templates = {}
+        # Per-phase timings of the last base import.
+        self.last_import_timings = OrderedDict()
+
+        # Folder listings of every pack, kept between sessions. The packs
+        # and their parts are only found the first time they are needed.
+        self.__part_manifest = None
+        self.__available_packs = None
+        # Part ID -> category, full path and pack.
+        self.__part_reference = None
+        # Pack -> category -> sorted part IDs.
+        self.__part_index = None
+
+    # Properties ---
+    @property
+    def part_manifest(self):
+        if self.__part_manifest is None:
+            self.__part_manifest = part_manifest.PartManifest(
+                self.PART_MANIFEST_PATH
+            )
+        return self.__part_manifest
+
+    @property
+    def available_packs(self):
+        if self.__available_packs is None:
+            # Create default part pack.
+            available_packs = [("Parts", self.MODEL_PATH)]
+            # Find any mods with model packs inside.
+            available_packs.extend(
+                self.part_manifest.get_mod_packs(self.MODS_PATH)
+            )
+            self.__available_packs = available_packs
+        return self.__available_packs
+
+    @property
+    def part_reference(self):
+        if self.__part_reference is None:
+            self.index_parts()
+        return self.__part_reference
+
+    @property
+    def part_index(self):
+        if self.__part_index is None:
+            self.index_parts()
+        return self.__part_index
+
+    def index_parts(self):
+        """Find the parts of every pack and build the part reference."""
+        part_reference = {}
+        part_index = {}
         for (pack_name, pack_folder) in self.available_packs:
+            pack_index = part_index.setdefault(pack_name, {})
             for category in self.get_categories(pack=pack_name):
                 parts = self.get_objs_from_category(category, pack=pack_name)
+                category_index = pack_index.setdefault(category, [])
                 for part in parts:
                     # Get Unique ID.
                     unique_id = os.path.splitext(part)[0]
@@ -91,11 +155,24 @@ class Builder(object):
                     search_path = pack_folder or self.MODEL_PATH
                     part_path = os.path.join(search_path, category, part)
                     # Place part information into reference.
-                    self.part_reference[unique_id] = {
+                    part_reference[unique_id] = {
                         "category": category,
                         "full_path": part_path,
                         "pack": pack_name
                     }
+                    category_index.append(unique_id)
+        # A part ID found in more than one pack belongs to the last one.
+        for pack_name, pack_index in part_index.items():
+            for category, category_index in pack_index.items():
+                pack_index[category] = sorted(
+                    unique_id for unique_id in set(category_index)
+                    if part_reference[unique_id]["pack"] == pack_name
+                    and part_reference[unique_id]["category"] == category
+                )
+        self.__part_reference = part_reference
+        self.__part_index = part_index
+        # Store any folders that changed for next time.
+        self.part_manifest.save()
 
     def clear_caches(self):
         """Clear all the caches we use in this class."""
@@ -109,6 +186,21 @@ class Builder(object):
         """Add item to preset cache."""
         self.__part_cache[object_id] = bpy_object.name
 
+    def get_batch_template(self, object_id):
+        """Get the object new parts should be copied from during a batch import.
+
+        Args:
+            object_id (str): The ID of the part.
+
+        Returns:
+            bpy.types.Object: The template object, or None if we are not
+                batch importing this ID.
+        """
+        template_name = self.__batch_templates.get(object_id, None)
+        if not template_name:
+            return None
+        return bpy.data.objects.get(template_name, None)
+
     def find_object_by_id(self, object_id):
         """Get the item from the part cache."""
         part_name = self.__part_cache.get(object_id, None)
@@ -118,6 +210,9 @@ class Builder(object):
         # If something is found, we need to check if it still exists.
         if part_name in bpy.data.objects:
             bpy_object = bpy.data.objects[part_name]
+            # Don't duplicate the hidden parts of instanced presets.
+            if "preset_template" in bpy_object:
+                return None
             return self.get_builder_object_from_bpy_object(bpy_object)
         # If all fails, return None.
         return None
@@ -150,6 +245,40 @@ class Builder(object):
             builder_object=self
         )
 
+    def get_snap_matrices(self, bpy_object):
+        """Get the local snap matrices of a part from its Blender object."""
+        object_id = bpy_object.get("ObjectID", None) or bpy_object.get("SnapID", None)
+        if not object_id:
+            return {}
+        use_class = self.get_part_class(object_id)
+        return use_class.get_snap_matrices_from_id(object_id)
+
+    def get_snap_graph(self, filter=None):
+        """Get the snap connectivity graph of the whole base.
+
+        The graph is cached until any part moves or is deleted.
+
+        Args:
+            filter (str): Only use snap points with this in their key.
+
+        Returns:
+            snapping.SnapGraph: The graph.
+        """
+        # Deleting an object doesn't send a depsgraph update, getting the
+        # objects drops the deleted ones and bumps the version.
+        bpy_objects = self.snap_points.get_objects(filter)
+        version = self.snap_points.version
+        cached = self.__snap_graphs.get(filter, None)
+        if cached and cached[0] == version:
+            return cached[1]
+
+        graph = snapping.SnapGraph(
+            bpy_objects,
+            self.snap_points.get_connections(filter)
+        )
+        self.__snap_graphs[filter] = (version, graph)
+        return graph
+
     def find_preset_by_id(self, preset_id):
         """Get the item from the part cache."""
         preset_name = self.__part_cache.get(preset_id, None)
@@ -159,6 +288,9 @@ class Builder(object):
         # If something is found, we need to check if it still exists.
         if preset_name in bpy.data.objects:
             bpy_object = bpy.data.objects[preset_name]
+            # Instances have no parts to duplicate.
+            if bpy_object.instance_type == "COLLECTION":
+                return None
             return preset.Preset.deserialise_from_object(
                 bpy_object=bpy_object,
                 builder_object=self
@@ -177,12 +309,12 @@ class Builder(object):
         skip_object_type = skip_object_type or []
 
         # Get all individual NMS parts.
-        flat_parts = [part for part in bpy.data.objects if "ObjectID" in part]
+        flat_parts = self.registry.get_objects("ObjectID")
         flat_parts = [part for part in flat_parts if part["ObjectID"] not in skip_object_type]
 
         # Include line conatrol points?
         if include_lines:
-            flat_parts.extend([part for part in bpy.data.objects if "SnapID" in part and not "ObjectID" in part])
+            flat_parts.extend([part for part in self.registry.get_objects("SnapID") if not "ObjectID" in part])
 
         # If exclude presets is on, just return the top level objects.
         if exclude_presets:
@@ -193,7 +325,7 @@ class Builder(object):
 
     def get_all_presets(self):
         """Get all Builder preset items in the scene."""
-        return [part for part in bpy.data.objects if "PresetID" in part]
+        return self.registry.get_objects("PresetID")
 
     def add_part(self, object_id, user_data=None, build_rigs=True):
         """Add an item based on it's object ID."""
@@ -222,13 +354,12 @@ class Builder(object):
             dict: Dictionary of base information.
         """
         # Get all object part data.
-        object_list = []
-
-        for item in self.get_all_parts(exclude_presets=get_presets):
-            object_id = item["ObjectID"]
-            use_class = self.get_part_class(object_id)
-            item_obj = use_class.deserialise_from_object(item, builder_object=self)
-            object_list.append(item_obj.serialise())
+        object_list = self.serialise_objects(
+            self.get_all_parts(exclude_presets=get_presets)
+        )
+        # Flatten instanced presets into their world space parts.
+        if not get_presets:
+            object_list.extend(self.serialise_preset_instances())
 
         # Create full dictionary.
         data = {"Objects": object_list}
@@ -252,12 +383,70 @@ class Builder(object):
 
         return data
 
-    def deserialise_from_data(self, data):
+    def serialise_preset_instances(self):
+        """Return the NMS "Objects" list for the parts of instanced presets.
+
+        Returns:
+            list: A dictionary of part information per instanced part.
+        """
+        bpy_objects = []
+        matrices = []
+        for instance in self.get_all_presets():
+            collection = instance.instance_collection
+            if instance.instance_type != "COLLECTION" or not collection:
+                continue
+            for item in sorted(collection.objects, key=Builder.by_order):
+                if "ObjectID" not in item:
+                    continue
+                bpy_objects.append(item)
+                matrices.append(instance.matrix_world @ item.matrix_world)
+        return self.serialise_objects(bpy_objects, matrices=matrices)
+
+    def serialise_objects(self, bpy_objects, matrices=None):
+        """Return the NMS "Objects" list for many parts at once.
+
+        All the world matrices are read into one array and turned into
+        Position, Up and At vectors in a single NumPy pass.
+
+        Args:
+            bpy_objects (list): The part objects to serialise.
+            matrices (list): World matrices to use instead of the ones on
+                the objects.
+
+        Returns:
+            list: A dictionary of part information per object.
+        """
+        if not bpy_objects:
+            return []
+        if matrices is None:
+            matrices = [item.matrix_world for item in bpy_objects]
+        part_classes = [self.get_part_class(item["ObjectID"]) for item in bpy_objects]
+        positions, ups, ats = matrix_utils.create_vectors_from_matrices(
+            matrices,
+            [part_class.MATRIX_MODE for part_class in part_classes]
+        )
+        return [
+            part_class.serialise_object(item, pos, up, at)
+            for item, part_class, pos, up, at in zip(
+                bpy_objects,
+                part_classes,
+                positions.tolist(),
+                ups.tolist(),
+                ats.tolist()
+            )
+        ]
+
+    def deserialise_from_data(self, data, batch=True):
         """Given NMS data, reconstruct the base.
 
         We don't need to create a new class, we can act upon this one.
-        """
 
+        Args:
+            data (dict): The NMS base data.
+            batch (bool): Group the objects by ObjectID and create each group
+                in one pass. Turn off to build every object individually.
+        """
+        self.last_import_timings.clear()
         base_version = data.get("BaseVersion", 8)
 
         compensate_normal = True
@@ -265,23 +454,126 @@ class Builder(object):
             compensate_normal = False
 
         # Reconstruct objects.
-        for part_data in data.get("Objects", []):
-            object_id = part_data.get("ObjectID").replace("^", "")
-            use_class = self.get_part_class(object_id)
-            use_class.deserialise_from_data(
-                part_data, self, compensate_normal=compensate_normal
+        objects_data = data.get("Objects", [])
+        if batch:
+            self.deserialise_objects_batch(
+                objects_data, compensate_normal=compensate_normal
             )
+        else:
+            start = time.perf_counter()
+            for part_data in objects_data:
+                object_id = part_data.get("ObjectID").replace("^", "")
+                use_class = self.get_part_class(object_id)
+                use_class.deserialise_from_data(
+                    part_data, self, compensate_normal=compensate_normal
+                )
+            self.last_import_timings["objects"] = time.perf_counter() - start
 
         # Reconstruct presets.
+        start = time.perf_counter()
         for preset_data in data.get("Presets", []):
             preset.Preset.deserialise_from_data(
                 preset_data, self, compensate_normal=compensate_normal
             )
+        self.last_import_timings["presets"] = time.perf_counter() - start
 
         # Build Rigs.
+        start = time.perf_counter()
         self.build_rigs()
+        self.last_import_timings["rigs"] = time.perf_counter() - start
         # Optimise control points.
+        start = time.perf_counter()
         self.optimise_control_points()
+        self.last_import_timings["optimise"] = time.perf_counter() - start
+
+        self.report_import_timings(len(objects_data))
+
+    def deserialise_objects_batch(self, objects_data, compensate_normal=True):
+        """Reconstruct a list of NMS objects, grouped by ObjectID.
+
+        The first object of each group is built as normal, which resolves
+        the FBX through the part reference exactly once. Every other object
+        in the group is then copied straight from that first object, skipping
+        the cache lookup and duplication work done for single parts.
+
+        The world matrices of every object are built up front in NumPy.
+
+        The original list order is kept on the "order" property so the base
+        exports in the same order it was imported.
+
+        Args:
+            objects_data (list): The "Objects" list of NMS base data.
+            compensate_normal (bool): Apply the Frontiers line compensation.
+        """
+        # Group the objects by ID, remembering where they were in the list.
+        start = time.perf_counter()
+        groups = OrderedDict()
+        for index, part_data in enumerate(objects_data):
+            object_id = part_data.get("ObjectID").replace("^", "")
+            groups.setdefault(object_id, []).append((index, part_data))
+        self.last_import_timings["group"] = time.perf_counter() - start
+
+        # Build all the world matrices in one go.
+        start = time.perf_counter()
+        modes = [
+            self.get_part_class(part_data.get("ObjectID").replace("^", "")).MATRIX_MODE
+            for part_data in objects_data
+        ]
+        world_matrices = matrix_utils.create_matrices_from_data(
+            objects_data, modes, compensate_normal=compensate_normal
+        )
+        self.last_import_timings["matrices"] = time.perf_counter() - start
+
+        order_offset = len(bpy.data.objects)
+        try:
+            # Resolve each ID once by building the first item of the group.
+            start = time.perf_counter()
+            self.part_library.load_meshes(self.part_reference, list(groups))
+            for object_id, items in groups.items():
+                index, part_data = items[0]
+                use_class = self.get_part_class(object_id)
+                item = use_class.deserialise_from_data(
+                    part_data,
+                    self,
+                    compensate_normal=compensate_normal,
+                    world_matrix=mathutils.Matrix(world_matrices[index].tolist())
+                )
+                item.order = order_offset + index
+                self.__batch_templates[object_id] = item.name
+            self.last_import_timings["resolve"] = time.perf_counter() - start
+
+            # Create the rest of each group from its template.
+            start = time.perf_counter()
+            for object_id, items in groups.items():
+                use_class = self.get_part_class(object_id)
+                for index, part_data in items[1:]:
+                    item = use_class.deserialise_from_data(
+                        part_data,
+                        self,
+                        compensate_normal=compensate_normal,
+                        world_matrix=mathutils.Matrix(world_matrices[index].tolist())
+                    )
+                    item.order = order_offset + index
+            self.last_import_timings["instance"] = time.perf_counter() - start
+        finally:
+            self.__batch_templates.clear()
+
+    def report_import_timings(self, object_count):
+        """Print how long each phase of the last import took.
+
+        Args:
+            object_count (int): The number of objects imported.
+        """
+        total = sum(self.last_import_timings.values())
+        phases = ", ".join(
+            "{0}: {1:.2f}s".format(phase, duration)
+            for phase, duration in self.last_import_timings.items()
+        )
+        print(
+            "Imported {0} objects in {1:.2f}s ({2})".format(
+                object_count, total, phases
+            )
+        )
 
     @staticmethod
     def by_order(bpy_object):
@@ -310,7 +602,7 @@ class Builder(object):
         pack = pack or "Parts"
         # Get the associated model path.
         search_path = self.get_model_path_from_pack(pack)
-        return os.listdir(search_path)
+        return self.part_manifest.get_categories(search_path)
 
     def get_preset_categories(self):
         """Get the list of preset categories.
@@ -318,17 +610,10 @@ class Builder(object):
         Returns:
             list: List of folders underneath preset path.
         """
-        return [
-            item for item in os.listdir(preset.Preset.PRESET_PATH)
-            if os.path.isdir(os.path.join(preset.Preset.PRESET_PATH, item))
-        ]
+        return preset.Preset.CATALOGUE.get_categories()
 
     def get_uncategorized_presets(self):
-        presets = []
-        for preset_file in os.listdir(preset.Preset.PRESET_PATH):
-            if preset_file.endswith(".json"):
-                presets.append(os.path.splitext(preset_file)[0])
-        return presets
+        return preset.Preset.CATALOGUE.get_presets_from_category(None)
 
     def get_presets_from_category(self, category):
         """Get a list of presets underneath a category.
@@ -336,11 +621,7 @@ class Builder(object):
         Args:
             category (str): The name of the category.
         """
-        presets = []
-        for preset_file in os.listdir(os.path.join(preset.Preset.PRESET_PATH, category)):
-            if preset_file.endswith(".json"):
-                presets.append(os.path.splitext(preset_file)[0])
-        return presets
+        return preset.Preset.CATALOGUE.get_presets_from_category(category)
 
     def get_objs_from_category(self, category, pack=None):
         """Get a list of parts belonging to a category.
@@ -355,11 +636,7 @@ class Builder(object):
         # Get the associated model path.
         search_path = self.get_model_path_from_pack(pack)
         category_path = os.path.join(search_path, category)
-        all_objs = [
-            part for part in os.listdir(category_path) if part.endswith(".fbx")
-        ]
-        file_names = sorted(all_objs)
-        return file_names
+        return self.part_manifest.get_parts(category_path)
 
     def get_obj_path(self, part):
         """Get the path to the OBJ file from a part."""
@@ -394,18 +671,7 @@ class Builder(object):
         """
         # Validate pack name.
         pack = pack or "Parts"
-        parts = []
-        for item, value in self.part_reference.items():
-            # Get pack and category values.
-            part_category = value["category"]
-            part_pack = value["pack"]
-            # Check both are valid.
-            pack_check = part_pack == pack
-            category_check = part_category == category
-            # Add to parts.
-            if pack_check and category_check:
-                parts.append(item)
-        return sorted(parts)
+        return list(self.part_index.get(pack, {}).get(category, []))
 
     def get_nice_name(self, part):
         """Get a nice version of the part id."""
@@ -415,10 +681,8 @@ class Builder(object):
 
     def save_preset_to_file(self, preset_name):
         # Get a file path.
-        all_presets = preset.Preset.get_presets()
-        if preset_name in preset.Preset.get_presets():
-            file_path = all_presets[preset_name]
-        else:
+        file_path = preset.Preset.CATALOGUE.get_path(preset_name)
+        if not file_path:
             file_path = os.path.join(self.PRESET_PATH, preset_name)
         # Add .json if it's not specified.
         if not file_path.endswith(".json"):
@@ -426,6 +690,7 @@ class Builder(object):
         # Save to file path
         with open(file_path, "w") as stream:
             json.dump(self.serialise(add_timestamp=True), stream, indent=4)
+        preset.Preset.CATALOGUE.invalidate()
 
     def build_rigs(self):
         """Get all items that require a rig and build them."""
@@ -436,46 +701,70 @@ class Builder(object):
             if hasattr(builder_object, "build_rig"):
                 builder_object.build_rig()
 
+    def rebuild_line_rigs(self):
+        """Rig all lines again with their current controls.
+
+        Used when switching between the driver and handler rig modes.
+        """
+        for power_line in self.registry.get_objects("start_control"):
+            power_line_obj = self.get_builder_object_from_bpy_object(power_line)
+            start_control = bpy.data.objects.get(power_line_obj.start_control, None)
+            end_control = bpy.data.objects.get(power_line_obj.end_control, None)
+            if start_control and end_control:
+                power_line_obj.build_rig(start_control, end_control)
+
     def optimise_control_points(self):
         """Find all control points that share the same location and combine them."""
         blend_utils.scene_refresh()
 
-        # First build a dictionary of controls that match.
-        power_control_objects = [obj for obj in bpy.data.objects if "rig_item" in obj]
-        power_control_reference = defaultdict(list)
-        for power_control in power_control_objects:
-            # Create a key that will group the controls based on their location.
-            # I am rounding the decimal point to 4 as the accuracy means items
-            # in the same location have slightly different values.
-            key = ",".join([str(round(loc, 3)) for loc in power_control.matrix_world.decompose()[0]])
-            # Append the control to the key.
-            power_control_reference[key].append(power_control)
+        # Cluster the controls by location. The points of controls in the
+        # same location have slightly different values, so use a tolerance.
+        power_controls = self.registry.get_objects("rig_item")
+        positions = [
+            power_control.matrix_world.to_translation()
+            for power_control in power_controls
+        ]
+        clusters = spatial_utils.cluster_points(
+            positions,
+            self.CONTROL_MERGE_DISTANCE
+        )
 
         # Swap any duplicate controls with the first instance.
-        for key, value in power_control_reference.items():
-            unique_control = value[0]
-            other_controls = value[1:]
-
-            if not other_controls:
-                continue
-
-            for control in other_controls:
-                power_line = blend_utils.get_item_by_name(control["power_line"])
-                power_line_obj = self.get_builder_object_from_bpy_object(power_line)
-                prev_start_control = bpy.data.objects[power_line_obj.start_control]
-                prev_end_control = bpy.data.objects[power_line_obj.end_control]
-
-                # Assign new controls.
-                if control == prev_start_control:
-                    power_line_obj.build_rig(
-                        unique_control,
-                        prev_end_control
-                    )
-                else:
-                    power_line_obj.build_rig(
-                        prev_start_control,
-                        unique_control
-                    )
+        replacements = {}
+        for cluster in clusters:
+            unique_control = power_controls[cluster[0]]
+            for index in cluster[1:]:
+                replacements[power_controls[index].name] = unique_control
+
+        if not replacements:
+            return
+
+        # Find the lines using the duplicates, so each is only rewired once.
+        power_lines = {}
+        for control_name in replacements:
+            power_line_name = bpy.data.objects[control_name].get("power_line", None)
+            if power_line_name and power_line_name in bpy.data.objects:
+                power_lines[power_line_name] = bpy.data.objects[power_line_name]
+
+        for power_line in power_lines.values():
+            power_line_obj = self.get_builder_object_from_bpy_object(power_line)
+            start_control = (
+                replacements.get(power_line_obj.start_control, None) or
+                bpy.data.objects[power_line_obj.start_control]
+            )
+            end_control = (
+                replacements.get(power_line_obj.end_control, None) or
+                bpy.data.objects[power_line_obj.end_control]
+            )
+            power_line_obj.build_rig(start_control, end_control)
 
-                # Hide away control.
-                blend_utils.remove_object(control.name)
+        # Remove all the duplicates at once. Take the pointers first, the
+        # objects can't be used once they are removed.
+        duplicates = [
+            bpy.data.objects[control_name] for control_name in replacements
+        ]
+        pointers = [duplicate.as_pointer() for duplicate in duplicates]
+        bpy.data.batch_remove(duplicates)
+        for pointer in pointers:
+            self.registry.remove(pointer)
+            self.snap_points.remove(pointer)
@@ -0,0 +1,137 @@
+"""A loopback socket the asset browser sends commands to.
+
+The server never blocks. Blender drains it from a timer, which reads
+whatever connections and data are waiting and hands back the commands that
+arrived. The protocol is described in asset_browser.client.
+"""
+import hmac
+import secrets
+import socket
+
+import no_mans_sky_base_builder.asset_browser.client as client
+
+
+class CommandServer(object):
+
+    # Largest amount of data read from a connection in one go.
+    BUFFER_SIZE = 65536
+    # Connections that never finish their line are dropped at this size.
+    MAX_MESSAGE_SIZE = 16 * 1024 * 1024
+
+    def __init__(self):
+        """CommandServer __init__."""
+        self.__socket = None
+        # Commands are only run if they carry this.
+        self.__token = None
+        # Client socket -> bytes received so far.
+        self.__clients = {}
+
+    @property
+    def port(self):
+        """The port the server listens on, None if it isn't running."""
+        if not self.__socket:
+            return None
+        return self.__socket.getsockname()[1]
+
+    @property
+    def token(self):
+        """The token clients must send, None if the server isn't running."""
+        return self.__token
+
+    @property
+    def running(self):
+        return self.__socket is not None
+
+    def start(self):
+        """Start listening on a free loopback port."""
+        if self.__socket:
+            return
+        listener = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        listener.bind((client.HOST, 0))
+        listener.listen()
+        listener.setblocking(False)
+        self.__socket = listener
+        self.__token = secrets.token_hex()
+
+    def stop(self):
+        """Stop listening and drop any open connections."""
+        for client_socket in self.__clients:
+            client_socket.close()
+        self.__clients.clear()
+        if self.__socket:
+            self.__socket.close()
+            self.__socket = None
+        self.__token = None
+
+    def accept(self):
+        """Accept every connection that is waiting."""
+        while True:
+            try:
+                client_socket, _ = self.__socket.accept()
+            except (BlockingIOError, InterruptedError):
+                return
+            client_socket.setblocking(False)
+            self.__clients[client_socket] = b""
+
+    def read(self, client_socket):
+        """Read what a connection has sent.
+
+        Returns:
+            bool: Whether the connection is finished.
+        """
+        while True:
+            try:
+                data = client_socket.recv(self.BUFFER_SIZE)
+            except (BlockingIOError, InterruptedError):
+                return False
+            except OSError:
+                return True
+            if not data:
+                return True
+            self.__clients[client_socket] += data
+            if len(self.__clients[client_socket]) > self.MAX_MESSAGE_SIZE:
+                self.__clients[client_socket] = b""
+                return True
+
+    def is_trusted(self, command):
+        """Check a command carries the token handed to the browser."""
+        token = command.get(client.TOKEN_KEY, None)
+        if not isinstance(token, str):
+            return False
+        return hmac.compare_digest(token, self.__token)
+
+    def poll(self):
+        """Collect the commands sent since the last poll.
+
+        Commands without the right token are dropped.
+
+        Returns:
+            list: The command dictionaries, in the order they arrived.
+        """
+        if not self.__socket:
+            return []
+        self.accept()
+
+        commands = []
+        for client_socket in list(self.__clients):
+            finished = self.read(client_socket)
+            data = self.__clients[client_socket]
+            # Commands are ready as soon as their line is complete.
+            *lines, remainder = data.split(b"\n")
+            if finished:
+                lines.append(remainder)
+                remainder = b""
+            for line in lines:
+                if not line.strip():
+                    continue
+                for command in client.decode_commands(line):
+                    if self.is_trusted(command):
+                        commands.append(command)
+                    else:
+                        print("Dropped an asset browser command without a valid token.")
+            if finished:
+                client_socket.close()
+                del self.__clients[client_socket]
+            else:
+                self.__clients[client_socket] = remainder
+        return commands
@@ -0,0 +1,80 @@
+"""Move lines to follow their controls without drivers.
+
+The driver rig gives every line three location drivers, a LOC_DIFF scale
+driver and a TRACK_TO constraint, which slows the depsgraph down on bases
+with thousands of cables. In the handler rig mode lines have no drivers or
+constraints. Instead the add-on update handler passes in any controls that
+moved, and the lines attached to them are recalculated in a single pass.
+"""
+import bpy
+import mathutils
+import no_mans_sky_base_builder.utils.matrix as matrix_utils
+
+
+class LineRigEvaluator(object):
+
+    def __init__(self, registry):
+        """LineRigEvaluator __init__
+
+        Args:
+            registry (registry.SceneRegistry): The scene registry, used to
+                find the lines attached to a control.
+        """
+        self.registry = registry
+
+    def get_lines_from_controls(self, control_names):
+        """Get the lines that start or end on any of the controls.
+
+        Args:
+            control_names (list): The names of the controls.
+
+        Returns:
+            list: The line Blender objects.
+        """
+        lines = {}
+        for control_name in control_names:
+            for key in ("start_control", "end_control"):
+                for line in self.registry.get_objects(key, control_name):
+                    lines[line.as_pointer()] = line
+        return list(lines.values())
+
+    def evaluate_controls(self, control_names):
+        """Move the lines attached to controls that moved.
+
+        Args:
+            control_names (list): The names of the controls that moved.
+        """
+        self.evaluate_lines(self.get_lines_from_controls(control_names))
+
+    def evaluate_lines(self, lines):
+        """Stretch lines between their start and end controls.
+
+        Lines that are still rigged with drivers are left alone.
+
+        Args:
+            lines (list): The line Blender objects.
+        """
+        use_lines = []
+        starts = []
+        ends = []
+        scales = []
+        for line in lines:
+            # Driver rigged lines have a TRACK_TO constraint.
+            if line.constraints:
+                continue
+            start = bpy.data.objects.get(line.get("start_control", ""), None)
+            end = bpy.data.objects.get(line.get("end_control", ""), None)
+            if not start or not end:
+                continue
+            use_lines.append(line)
+            # Same as the drivers, which read the control locations.
+            starts.append(start.location)
+            ends.append(end.location)
+            scales.append(line.scale)
+
+        if not use_lines:
+            return
+
+        matrices = matrix_utils.create_line_matrices(starts, ends, scales)
+        for line, matrix in zip(use_lines, matrices):
+            line.matrix_world = mathutils.Matrix(matrix.tolist())
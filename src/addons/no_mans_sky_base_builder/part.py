@@ -5,8 +5,10 @@ from copy import copy
 
 import bpy
 import mathutils
+import no_mans_sky_base_builder.snapping as snapping
 import no_mans_sky_base_builder.utils.blend_utils as blend_utils
 import no_mans_sky_base_builder.utils.material as material
+import no_mans_sky_base_builder.utils.matrix as matrix_utils
 import no_mans_sky_base_builder.utils.python as python_utils
 
 
@@ -14,12 +16,18 @@ class Part(object):
 
     DEFAULT_USER_DATA = 0
     DEFAULT_BELONGS_TO_PRESET = False
+    # The rules used when building many matrices at once.
+    MATRIX_MODE = matrix_utils.PART
     FILE_PATH = os.path.dirname(os.path.realpath(__file__))
     SNAP_MATRIX_JSON = os.path.join(FILE_PATH, "resources", "snapping_info.json")
     SNAP_PAIR_JSON = os.path.join(FILE_PATH,  "resources", "snapping_pairs.json")
 
-    SNAP_MATRIX_DICTIONARY = python_utils.load_dictionary(SNAP_MATRIX_JSON)
-    SNAP_PAIR_DICTIONARY = python_utils.load_dictionary(SNAP_PAIR_JSON)
+    SNAP_MATRIX_DICTIONARY = python_utils.LazyDictionary(SNAP_MATRIX_JSON)
+    SNAP_PAIR_DICTIONARY = python_utils.LazyDictionary(SNAP_PAIR_JSON)
+    # Snap groups and matrices, compiled from the dictionaries above.
+    SNAP_INDEX = snapping.SnapIndex(SNAP_MATRIX_DICTIONARY, SNAP_PAIR_DICTIONARY)
+    # Rotate by 180 around Y, so snap points face each other.
+    FLIP_Y_MATRIX = mathutils.Matrix.Rotation(math.radians(180.0), 4, "Y")
 
     SNAP_CACHE = {}
 
@@ -68,6 +76,8 @@ class Part(object):
         builder_object.add_to_part_cache(object_id, self.__object)
 
         self.snap_id = object_id
+        if not bpy_object:
+            builder_object.registry.update(self.__object)
 
     # Properties ---
     @property
@@ -121,6 +131,7 @@ class Part(object):
     @matrix_world.setter
     def matrix_world(self, value):
         self.__object.matrix_world = value
+        self.builder.snap_points.update(self.__object)
 
     @property
     def order(self):
@@ -181,6 +192,7 @@ class Part(object):
     @belongs_to_preset.setter
     def belongs_to_preset(self, value):
         self.__object["belongs_to_preset"] = value
+        self.builder.registry.update(self.__object)
 
     @property
     def hide_select(self):
@@ -223,15 +235,28 @@ class Part(object):
                 self.__object.driver_remove(dr.data_path, -1)
 
 
-    def duplicate(self):
-        """Duplicate the part and return it."""
+    def duplicate(self, linked=None):
+        """Duplicate the part and return it.
+
+        Args:
+            linked (bool): Share the mesh data with this part rather than
+                copying it. Defaults to the builder's instancing setting.
+        """
+        if linked is None:
+            linked = self.builder.use_instancing
+
         # Create new object as whole.
         new_object = self.__object.copy()
-        # Transfer a copy of the mesh and material.
-        new_object.data = self.__object.data.copy()
+        if linked:
+            # Keep the shared mesh and give both objects their own colour.
+            material.use_object_materials(self.__object)
+            material.use_object_materials(new_object)
+        else:
+            # Transfer a copy of the mesh and material.
+            new_object.data = self.__object.data.copy()
 
-        if self.__object.active_material:
-            new_object.active_material = self.__object.active_material.copy()
+            if self.__object.active_material:
+                new_object.active_material = self.__object.active_material.copy()
 
         # Clear Parent
         if new_object.parent:
@@ -272,11 +297,26 @@ class Part(object):
         of caching and duplicating existing items via th Builder class.
 
         Method Priority.
+        - If the builder is batch importing this ID, copy the template.
         - If the object already exists in the builder cache, we can just
             dupliciate it.
+        - If the part library has an up to date mesh, use that.
         - If it doesn't exist in the cache, find the obj path.
         - If the obj path doesn't exist, just create a cube.
         """
+        # Copy the template when batch importing.
+        template = self.builder.get_batch_template(object_id)
+        if template:
+            item = template.copy()
+            if self.builder.use_instancing:
+                material.use_object_materials(template)
+                material.use_object_materials(item)
+            else:
+                item.data = template.data.copy()
+            item.name = object_id
+            blend_utils.add_to_scene(item)
+            return item
+
         # Duplicate existing.
         existing_object = self.builder.find_object_by_id(object_id)
         if existing_object:
@@ -286,6 +326,15 @@ class Part(object):
             blend_utils.add_to_scene(duped)
             return duped
 
+        # Use the precompiled part library if it holds this part.
+        mesh = self.builder.part_library.get_mesh(
+            self.builder.part_reference, object_id
+        )
+        if mesh:
+            item = bpy.data.objects.new(object_id, mesh)
+            blend_utils.add_to_scene(item)
+            return item
+
         # Locate OBJ.
         obj_path = self.builder.get_obj_path(object_id)
         # If it exists, import the obj.
@@ -347,6 +396,31 @@ class Part(object):
         }
 
     # Class Methods ---
+    @classmethod
+    def serialise_object(cls, bpy_object, pos, up, at):
+        """Return NMS compatible dictionary using vectors worked out elsewhere.
+
+        This lets the builder export many parts without wrapping each one.
+
+        Args:
+            bpy_object (bpy.types.Object): The part object.
+            pos (list): The Position vector.
+            up (list): The Up vector.
+            at (list): The At vector.
+
+        Returns:
+            dict: Dictionary of part information.
+        """
+        return {
+            "ObjectID": "^{0}".format(bpy_object["ObjectID"]),
+            "Position": [pos[0], pos[1], pos[2]],
+            "Up": [up[0], up[1], up[2]],
+            "At": [at[0], at[1], at[2]],
+            "Timestamp": int(bpy_object["Timestamp"]),
+            "UserData": int(bpy_object["UserData"]),
+            "Message": bpy_object.get("Message", "")
+        }
+
     @classmethod
     def deserialise_from_object(cls, bpy_object, builder_object):
         """Reconstruct the class using an existing Blender object."""
@@ -354,10 +428,21 @@ class Part(object):
         return part
 
     @classmethod
-    def deserialise_from_data(cls, data, builder_object, build_rigs=True, *args, **kwargs):
+    def deserialise_from_data(
+            cls,
+            data,
+            builder_object,
+            build_rigs=True,
+            world_matrix=None,
+            *args,
+            **kwargs):
         """Reconstruct the class using an a data.
 
         Data usually comes from NMS or the serialise method.
+
+        Args:
+            world_matrix (mathutils.Matrix): A matrix already built from the
+                data's vectors, such as one from a batch import.
         """
         # Create object based on the ID.
         object_id = data["ObjectID"].replace("^", "")
@@ -373,7 +458,8 @@ class Part(object):
         up = data.get("Up", [0.0, 0.0, 0.0])
         at = data.get("At", [0.0, 0.0, 0.0])
         # Set part position.
-        world_matrix = cls.create_matrix_from_vectors(pos, up, at)
+        if world_matrix is None:
+            world_matrix = cls.create_matrix_from_vectors(pos, up, at)
         part.matrix_world = world_matrix
         part.rotation = world_matrix.to_euler()
         # Apply metadata
@@ -436,22 +522,35 @@ class Part(object):
         # Get the snap points from the dictionary.
         return self.SNAP_MATRIX_DICTIONARY[use_group]["snap_points"]
 
-    def get_snap_group(self):
-        """Search through the grouping dictionary and return the snap group.
+    def get_snap_matrices(self):
+        """Get the local matrix of each snap point, keyed by snap key.
 
-        Args:
-            part_id (str): The ID of the building part.
+        The matrices are shared between all parts, copy before modifying.
         """
-        for group, value in self.SNAP_MATRIX_DICTIONARY.items():
-            parts = value["parts"]
-            if self.object_id in parts:
-                return group
+        return self.get_snap_matrices_from_id(self.object_id)
+
+    @classmethod
+    def get_snap_matrices_from_id(cls, object_id):
+        """Get the local snap matrices of a part without wrapping an object."""
+        return cls.SNAP_INDEX.get_matrices(cls.SNAP_INDEX.get_group(object_id))
+
+    def get_snap_inverse_matrices(self):
+        """Get the inverted local matrix of each snap point."""
+        return self.SNAP_INDEX.get_inverse_matrices(self.get_snap_group())
+
+    def get_snap_group(self):
+        """Get the snap group the part belongs to."""
+        return self.SNAP_INDEX.get_group(self.object_id)
 
     def get_snap_pair_options(self, target_item):
         """Get the compatible snap points
 
         Args:
             target_item (part.Part):
+
+        Returns:
+            tuple: The list of target snap keys and the list of source snap
+                keys.
         """
         # Get Groups.
         target_group = target_item.get_snap_group()
@@ -462,10 +561,7 @@ class Part(object):
             return None
 
         # Get Pairing.
-        if target_group in self.SNAP_PAIR_DICTIONARY:
-            snapping_dictionary = self.SNAP_PAIR_DICTIONARY[target_group]
-            if source_group in snapping_dictionary:
-                return snapping_dictionary[source_group]
+        return self.SNAP_INDEX.get_pairing(target_group, source_group)
 
     def snap_to(
             self,
@@ -510,12 +606,7 @@ class Part(object):
             return False
 
         # Get pair options.
-        target_pairing_options = [
-            part.strip() for part in snap_pairing_options[0].split(",")
-        ]
-        source_pairing_options = [
-            part.strip() for part in snap_pairing_options[1].split(",")
-        ]
+        target_pairing_options, source_pairing_options = snap_pairing_options
 
         # Get the per item reference.
         target_item_snap_reference = self.SNAP_CACHE.get(target.name, {})
@@ -603,44 +694,16 @@ class Part(object):
         # s = source, t = target, o = local snap matrix.
         # [(s.so)^-1 * (t.to)] * [(s.so) * 180 rot-matrix * (s.so)^-1]
 
-        # First Create a Flipped Y Matrix based on local offset.
-        start_matrix = copy(self.matrix_world)
-        start_matrix_inv = copy(self.matrix_world)
-        start_matrix_inv.invert()
-        print(source_local_matrix_datas)
-        offset_matrix = mathutils.Matrix(
-            source_local_matrix_datas[source_key]["matrix"]
-        )
-
-        # Target Matrix
-        target_matrix = copy(target.matrix_world)
-        target_offset_matrix = mathutils.Matrix(
-            target_local_matrix_datas[target_key]["matrix"]
-        )
-
-        # Calculate the location of the target matrix.
-        target_snap_matrix = target_matrix @ target_offset_matrix
-
-        # Calculate snap position.
-        snap_matrix = start_matrix @ offset_matrix
-        snap_matrix_inv = copy(snap_matrix)
-        snap_matrix_inv.invert()
-
-        # Rotate by 180 around Y at the origin.
-        origin_matrix = snap_matrix_inv @ snap_matrix
-        rotation_matrix = mathutils.Matrix.Rotation(
-            math.radians(180.0),
-            4,
-            "Y"
+        # Which reduces to (t.to) * 180 rot-matrix * so^-1, with the snap
+        # matrices and their inverses built ahead of time.
+        target_offset_matrix = target.get_snap_matrices()[target_key]
+        offset_matrix_inv = self.get_snap_inverse_matrices()[source_key]
+        target_location = (
+            target.matrix_world @
+            target_offset_matrix @
+            self.FLIP_Y_MATRIX @
+            offset_matrix_inv
         )
-        origin_flipped_matrix = rotation_matrix @ origin_matrix
-        flipped_snap_matrix = snap_matrix @ origin_flipped_matrix
-
-        flipped_local_offset = start_matrix_inv @ flipped_snap_matrix
-
-        # Diff between the two.
-        flipped_local_offset.invert()
-        target_location = target_snap_matrix @ flipped_local_offset
 
         # Set matrix, and then re-apply radian rotation for better accuracy.
         self.matrix_world = target_location
@@ -681,30 +744,28 @@ class Part(object):
             source_filter (str): A filter for the snap points being used.
             target_filter (str): A filter for the snap points being used.
         """
-        source_matrices = self.get_snap_points()
-        target_matrices = target.get_snap_points()
+        source_matrices = self.get_snap_matrices()
+        target_matrices = target.get_snap_matrices()
+
+        # Put the target points in world space once, not per source point.
+        target_snap_matrices = {
+            target_key: target.matrix_world @ local_target_matrix
+            for target_key, local_target_matrix in target_matrices.items()
+            if not target_filter or target_filter in target_key
+        }
 
         lowest_source_key = None
         lowest_target_key = None
         lowest_distance = 9999999
-        for source_key, source_info in source_matrices.items():
+        for source_key, local_source_matrix in source_matrices.items():
             # Check source filter.
             if source_filter and source_filter not in source_key:
                 continue
 
-            for target_key, target_info in target_matrices.items():
-                # Check target filter.
-                if target_filter and target_filter not in target_key:
-                    continue
-
+            source_snap_matrix = self.matrix_world @ local_source_matrix
+            for target_key, target_snap_matrix in target_snap_matrices.items():
                 # Find the distance and check if its lower then the one
                 # stored.
-                local_source_matrix = mathutils.Matrix(source_info["matrix"])
-                local_target_matrix = mathutils.Matrix(target_info["matrix"])
-
-                source_snap_matrix = self.matrix_world @ local_source_matrix
-                target_snap_matrix = target.matrix_world @ local_target_matrix
-
                 distance = blend_utils.get_distance_between(
                     source_snap_matrix, target_snap_matrix
                 )
@@ -718,19 +779,19 @@ class Part(object):
     def get_matrix_from_key(self, key):
         """Get the matrix for a given item and the snap key."""
         # Get relavant snap information from item.
-        snap_matrices = self.get_snap_points()
+        snap_matrices = self.get_snap_matrices()
         # Validate key entry.
         if key not in snap_matrices:
             return None
-        # Return matrix.
-        return snap_matrices[key]["matrix"]
+        # Return a copy, the snap matrices are shared.
+        return snap_matrices[key].copy()
 
     def has_snap_point(self, filter=None):
         """Check for any matrix that would match the given filter."""
         # Get relavant snap information from item.
-        snap_matrices = self.get_snap_points()
+        snap_matrices = self.get_snap_matrices()
         # Validate key entry.
-        for key, info in snap_matrices.items():
+        for key in snap_matrices:
             if not filter or filter in key:
                 return True
         return False
@@ -740,44 +801,11 @@ class Part(object):
 
         Args:
             filter (str): A filter for the snap points being used.
+            include_lines (bool): Include line control points.
         """
-        source_matrices = self.get_snap_points()
-        if filter is not None:
-            source_matrices = { k: v for k, v in source_matrices.items() if filter in k }
-
-        source_points = [self.matrix_world @ mathutils.Matrix(info["matrix"]) for k, info in source_matrices.items()]
-
-        result = []
-        if not source_points:
-            return result
-
-        for target in self.builder.get_all_parts(include_lines=include_lines):
-            if target == self.object:
-                continue
-
-            target = self.builder.get_builder_object_from_bpy_object(target)
-            snap_points = target.get_snap_points()
-            if not snap_points:
-                continue
-            for target_key, target_info in snap_points.items():
-                # Check target filter.
-                if filter and filter not in target_key:
-                    continue
-
-                local_target_matrix = mathutils.Matrix(target_info["matrix"])
-                target_snap_matrix = target.matrix_world @ local_target_matrix
-
-                found = False
-                for source_snap_matrix in source_points:
-                    distance = blend_utils.get_distance_between(
-                        source_snap_matrix, target_snap_matrix
-                    )
-                    if distance < 0.050:  # XXX what is actual game threshold?
-                        found = True
-                        break
-                if found:
-                    result.append(target)
-                    break
-
-        return result
-
+        graph = self.builder.get_snap_graph(filter)
+        return [
+            self.builder.get_builder_object_from_bpy_object(target)
+            for target in graph.get_neighbours(self.object)
+            if include_lines or "ObjectID" in target
+        ]
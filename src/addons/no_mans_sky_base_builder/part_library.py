@@ -0,0 +1,160 @@
+"""A single blend file holding the mesh of every part in the part reference.
+
+Importing an FBX goes through the import operator, which is slow when done
+for hundreds of part types. The library packs all the meshes into one blend
+file once, so they can be appended in a single `bpy.data.libraries.load`.
+
+Each entry in the library index remembers the size of the FBX it was built
+from. If the FBX changes (or is missing from the library) the part falls back
+to a regular FBX import.
+"""
+import json
+import os
+
+import bpy
+
+
+class PartLibrary(object):
+
+    def __init__(self, library_path):
+        """PartLibrary __init__
+
+        Args:
+            library_path (str): The path to the library blend file. The index
+                is stored next to it as a json file.
+        """
+        self.library_path = library_path
+        self.index_path = os.path.splitext(library_path)[0] + ".json"
+        self.__index = None
+        # Part ID to the name of the mesh appended into this blend session.
+        self.__loaded = {}
+
+    @property
+    def index(self):
+        """Get the library index, reading it on first use."""
+        if self.__index is None:
+            self.__index = {}
+            if os.path.isfile(self.index_path):
+                with open(self.index_path, "r") as stream:
+                    self.__index = json.load(stream)
+        return self.__index
+
+    def is_valid(self, object_id, fbx_path):
+        """Check the library holds an up to date mesh for the part.
+
+        Args:
+            object_id (str): The ID of the part.
+            fbx_path (str): The FBX the part would otherwise be imported from.
+        """
+        if not os.path.isfile(self.library_path):
+            return False
+        entry = self.index.get(object_id, None)
+        if not entry:
+            return False
+        if not fbx_path or not os.path.isfile(fbx_path):
+            return False
+        return entry["size"] == os.path.getsize(fbx_path)
+
+    def load_meshes(self, part_reference, object_ids):
+        """Append the meshes of many parts in a single library load.
+
+        Args:
+            part_reference (dict): The builder part reference.
+            object_ids (list): The IDs of the parts to load.
+        """
+        to_load = []
+        for object_id in object_ids:
+            if self.get_loaded_mesh(object_id):
+                continue
+            fbx_path = part_reference.get(object_id, {}).get("full_path", None)
+            if self.is_valid(object_id, fbx_path):
+                to_load.append(object_id)
+
+        if not to_load:
+            return
+
+        with bpy.data.libraries.load(self.library_path, link=False) as (data_from, data_to):
+            requested = [
+                object_id for object_id in to_load
+                if self.index[object_id]["mesh"] in data_from.meshes
+            ]
+            data_to.meshes = [self.index[object_id]["mesh"] for object_id in requested]
+
+        # Blender may rename the appended meshes to avoid clashes.
+        for object_id, mesh in zip(requested, data_to.meshes):
+            if mesh is not None:
+                self.__loaded[object_id] = mesh.name
+
+    def get_loaded_mesh(self, object_id):
+        """Get the appended mesh of a part, if it is still in the blend data."""
+        mesh_name = self.__loaded.get(object_id, None)
+        if not mesh_name:
+            return None
+        return bpy.data.meshes.get(mesh_name, None)
+
+    def get_mesh(self, part_reference, object_id):
+        """Get the mesh for a part, appending it from the library if needed.
+
+        Args:
+            part_reference (dict): The builder part reference.
+            object_id (str): The ID of the part.
+
+        Returns:
+            bpy.types.Mesh: The mesh, or None if the library can't provide it.
+        """
+        mesh = self.get_loaded_mesh(object_id)
+        if mesh:
+            return mesh
+        self.load_meshes(part_reference, [object_id])
+        return self.get_loaded_mesh(object_id)
+
+    def build(self, part_reference):
+        """Import every part FBX and write the meshes to the library file.
+
+        This is slow and is meant to be run from Blender in background mode.
+        See `automation_tools/part_library_generator`.
+
+        Args:
+            part_reference (dict): The builder part reference.
+        """
+        index = {}
+        meshes = set()
+        for object_id, part_info in sorted(part_reference.items()):
+            fbx_path = part_info["full_path"]
+            if not os.path.isfile(fbx_path):
+                continue
+            prev_objects_capture = set(bpy.data.objects.keys())
+            bpy.ops.import_scene.fbx(filepath=fbx_path)
+            new_objects = [
+                bpy.data.objects[name] for name in bpy.data.objects.keys()
+                if name not in prev_objects_capture
+            ]
+            new_meshes = [item.data for item in new_objects if item.type == "MESH"]
+            for item in new_objects:
+                bpy.data.objects.remove(item, do_unlink=True)
+            if not new_meshes:
+                continue
+            # Keep the first mesh, the same one a regular import would use.
+            mesh = new_meshes[0]
+            mesh.name = object_id
+            mesh.materials.clear()
+            meshes.add(mesh)
+            index[object_id] = {
+                "pack": part_info["pack"],
+                "category": part_info["category"],
+                "mesh": mesh.name,
+                "size": os.path.getsize(fbx_path)
+            }
+
+        library_folder = os.path.dirname(self.library_path)
+        if not os.path.exists(library_folder):
+            os.makedirs(library_folder)
+        bpy.data.libraries.write(self.library_path, meshes, fake_user=True)
+        with open(self.index_path, "w") as stream:
+            json.dump(index, stream, indent=4)
+
+        # Clean up and reload the index.
+        for mesh in meshes:
+            bpy.data.meshes.remove(mesh)
+        self.__index = None
+        self.__loaded.clear()
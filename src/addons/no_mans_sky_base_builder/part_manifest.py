@@ -0,0 +1,144 @@
+"""A persisted listing of the part packs, categories and model files.
+
+The builder finds its parts by listing the model folder of every pack, and
+every category folder inside it. That is thousands of directory entries to
+read each time Blender starts, most of them unchanged since last time.
+
+The manifest stores the listing of each folder along with its modification
+time in a JSON file in the user folder. On startup only a stat of each
+folder is needed, and just the folders that changed are listed again. The
+manifest file is only written when something changed.
+"""
+import json
+import os
+import time
+
+# Bump this to throw away manifests written by older versions.
+MANIFEST_VERSION = 1
+# Folders modified more recently than this are listed again on the next
+# start, as some file systems only store mtimes to the nearest 2 seconds.
+MTIME_RESOLUTION = 2.0
+# The extension of part model files.
+PART_EXTENSION = ".fbx"
+
+
+class PartManifest(object):
+
+    def __init__(self, manifest_path):
+        """PartManifest __init__
+
+        Args:
+            manifest_path (str): The JSON file the manifest is kept in.
+        """
+        self.manifest_path = manifest_path
+        # Folder path -> [mtime, folder listing].
+        self.__folders = {}
+        # Folders looked at since loading, everything else is dropped on save.
+        self.__used = set()
+        self.__changed = False
+        self.load()
+
+    def load(self):
+        """Read the manifest file, starting empty if it is missing or stale."""
+        self.__folders = {}
+        try:
+            with open(self.manifest_path, "r") as stream:
+                data = json.load(stream)
+        except (OSError, ValueError):
+            return
+        if not isinstance(data, dict):
+            return
+        if data.get("version", None) != MANIFEST_VERSION:
+            return
+        self.__folders = data.get("folders", {})
+
+    def save(self):
+        """Write the manifest file if any folder listing changed."""
+        # Forget folders that no longer belong to a pack.
+        for folder_path in list(self.__folders):
+            if folder_path not in self.__used:
+                del self.__folders[folder_path]
+                self.__changed = True
+        if not self.__changed:
+            return
+
+        data = {"version": MANIFEST_VERSION, "folders": self.__folders}
+        temp_path = self.manifest_path + ".tmp"
+        try:
+            manifest_folder = os.path.dirname(self.manifest_path)
+            if not os.path.exists(manifest_folder):
+                os.makedirs(manifest_folder)
+            with open(temp_path, "w") as stream:
+                json.dump(data, stream)
+            # Replace in one go so a crash can't leave half a manifest.
+            os.replace(temp_path, self.manifest_path)
+        except OSError:
+            # The manifest is only a cache, we can list the folders again.
+            return
+        self.__changed = False
+
+    def list_folder(self, folder_path):
+        """Get the listing of a folder, only reading it if it changed.
+
+        Args:
+            folder_path (str): The folder to list.
+
+        Returns:
+            list: The names in the folder, empty if it doesn't exist.
+        """
+        self.__used.add(folder_path)
+        cached = self.__folders.get(folder_path, None)
+        try:
+            mtime = os.stat(folder_path).st_mtime
+            if cached and cached[0] == mtime:
+                return cached[1]
+            listing = sorted(os.listdir(folder_path))
+        except OSError:
+            if cached is not None:
+                del self.__folders[folder_path]
+                self.__changed = True
+            return []
+
+        if time.time() - mtime < MTIME_RESOLUTION:
+            # Too recent to trust, look again next time.
+            mtime = None
+        self.__folders[folder_path] = [mtime, listing]
+        self.__changed = True
+        return listing
+
+    def get_mod_packs(self, mods_path):
+        """Find the mods that have a model pack inside.
+
+        Args:
+            mods_path (str): The user mod folder.
+
+        Returns:
+            list: A (mod name, model path) tuple for each mod.
+        """
+        packs = []
+        for mod_folder in self.list_folder(mods_path):
+            full_mod_path = os.path.join(mods_path, mod_folder)
+            if "models" in self.list_folder(full_mod_path):
+                packs.append(
+                    (mod_folder, os.path.join(full_mod_path, "models"))
+                )
+        return packs
+
+    def get_categories(self, pack_path):
+        """Get the category folders of a pack.
+
+        Args:
+            pack_path (str): The model folder of the pack.
+        """
+        return self.list_folder(pack_path)
+
+    def get_parts(self, category_path):
+        """Get the sorted part model files in a category folder.
+
+        Args:
+            category_path (str): The category folder.
+        """
+        return [
+            part for part in self.list_folder(category_path)
+            if part.endswith(PART_EXTENSION)
+        ]
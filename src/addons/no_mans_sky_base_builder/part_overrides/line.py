@@ -5,12 +5,18 @@ from copy import copy
 import bpy
 import mathutils
 import no_mans_sky_base_builder.part
+import no_mans_sky_base_builder.snapping as snapping
 import no_mans_sky_base_builder.utils.blend_utils as blend_utils
 import no_mans_sky_base_builder.utils.constraints as constraints
 import no_mans_sky_base_builder.utils.material as material
+import no_mans_sky_base_builder.utils.matrix as matrix_utils
+import no_mans_sky_base_builder.utils.spatial as spatial_utils
 
 
 class Line(no_mans_sky_base_builder.part.Part):
+
+    MATRIX_MODE = matrix_utils.LINE
+
     def __init__(self, bpy_object=None, build_rigs=True, *args, **kwargs):
         super(Line, self).__init__(
             bpy_object=bpy_object,
@@ -52,10 +58,25 @@ class Line(no_mans_sky_base_builder.part.Part):
         "POWER_A": { "matrix": mathutils.Matrix() },
         "POWER_B": { "matrix": mathutils.Matrix.Translation([0, 0, 1]) }
     }
+    __snap_matrices = {
+        key: info["matrix"] for key, info in __snap_points.items()
+    }
+    __snap_inverse_matrices = {
+        key: matrix.inverted() for key, matrix in __snap_matrices.items()
+    }
     def get_snap_points(self):
         """Override base class for lines with synthetic snap points at each end."""
         return self.__snap_points
 
+    @classmethod
+    def get_snap_matrices_from_id(cls, object_id):
+        """Override base class with the matrices of the synthetic snap points."""
+        return cls.__snap_matrices
+
+    def get_snap_inverse_matrices(self):
+        """Override base class with the inverses of the synthetic snap points."""
+        return self.__snap_inverse_matrices
+
     def build_rig(self, start=None, end=None):
         """Given the power line object, create 2 empties to control end points.
 
@@ -88,9 +109,10 @@ class Line(no_mans_sky_base_builder.part.Part):
         # Remove old constraints.
         self.remove_constraints()
 
-        constraints.point_constraint(self.object, start)
-        constraints.stretch_constraint(self.object, start, end)
-        constraints.aim_constraint(self.object, end)
+        if self.builder.use_line_drivers:
+            constraints.point_constraint(self.object, start)
+            constraints.stretch_constraint(self.object, start, end)
+            constraints.aim_constraint(self.object, end)
 
         # Tag controls onto powerline
         self.start_control = start.name
@@ -98,6 +120,11 @@ class Line(no_mans_sky_base_builder.part.Part):
         # Tag powerlines onto controls.
         start["power_line"] = self.object.name
         end["power_line"] = self.object.name
+        self.builder.registry.update(self.object)
+
+        # Without drivers, the line has to be moved into place.
+        if not self.builder.use_line_drivers:
+            self.builder.line_rigs.evaluate_lines([self.object])
 
     def split(self):
         # Middle control.
@@ -178,7 +205,13 @@ class Line(no_mans_sky_base_builder.part.Part):
 
     # Class Methods ---
     @classmethod
-    def deserialise_from_data(cls, data, builder_object, build_rigs=True, compensate_normal=True):
+    def deserialise_from_data(
+            cls,
+            data,
+            builder_object,
+            build_rigs=True,
+            compensate_normal=True,
+            world_matrix=None):
         """Reconstruct the class using an a data.
 
         Data usually comes from NMS or the serialise method.
@@ -191,7 +224,7 @@ class Line(no_mans_sky_base_builder.part.Part):
             build_rigs=build_rigs
         )
         # if not build_rigs:
-        part.position_matrix(data, part, compensate_normal)
+        part.position_matrix(data, part, compensate_normal, world_matrix)
 
         # Apply metadata
         part.time_stamp = data.get("Timestamp", 1539024128)
@@ -233,6 +266,7 @@ class Line(no_mans_sky_base_builder.part.Part):
 
         point["rig_item"] = True
         point["SnapID"] = "POWER_CONTROL"
+        builder.registry.update(point)
 
         # blender will automatically de-dupe on rename, but it will rename
         # some *other* object, whose name we might already have stored as text.
@@ -244,13 +278,19 @@ class Line(no_mans_sky_base_builder.part.Part):
             name = "{}.{:0=3d}".format(base_name, n)
 
         point.name = name
-        point.data.name = name+"_SHAPE"
+        # Don't rename mesh data that is shared with other controls.
+        if point.data.users == 1:
+            point.data.name = name+"_SHAPE"
         builder.add_to_part_cache("POWER_CONTROL", point)
 
         return bpy.data.objects[point.name]
 
     @staticmethod
-    def position_matrix(data, bpy_object, compensate_normal=True):
+    def position_matrix(data, bpy_object, compensate_normal=True, world_matrix=None):
+        # Use a matrix that was already built, if given.
+        if world_matrix is not None:
+            bpy_object.matrix_world = world_matrix
+            return
         # Get location data.
         pos = data.get("Position", [0.0, 0.0, 0.0])
         up = data.get("Up", [0.0, 0.0, 0.0])
@@ -340,11 +380,10 @@ class Line(no_mans_sky_base_builder.part.Part):
             # Get local value.
             source_local_value = source.get_matrix_from_key(source_key)
             # Create a control if it's found.
-            if not source_local_value:
+            if source_local_value is None:
                 source_control = None
             else:
-                source_local = mathutils.Matrix(source_local_value)
-                source_snap_matrix = source.matrix_world @ source_local
+                source_snap_matrix = source.matrix_world @ source_local_value
                 source_control = Line.create_point(builder, source.name + "_START")
                 source_control.location = source_snap_matrix.decompose()[0]
                 source_control["snapped_to"] = source.name
@@ -353,11 +392,10 @@ class Line(no_mans_sky_base_builder.part.Part):
             target_control = target
         else:
             target_local_value = target.get_matrix_from_key(target_key)
-            if not target_local_value:
+            if target_local_value is None:
                 target_control = None
             else:
-                target_local = mathutils.Matrix(target_local_value)
-                target_snap_matrix = target.matrix_world @ target_local
+                target_snap_matrix = target.matrix_world @ target_local_value
                 target_control = Line.create_point(builder, target.name + "_END")
                 target_control.location = target_snap_matrix.decompose()[0]
                 target_control["snapped_to"] = target.name
@@ -365,6 +403,106 @@ class Line(no_mans_sky_base_builder.part.Part):
 
         return source_control, target_control
 
+    @staticmethod
+    def route_control_points(items, builder):
+        """Find the shortest set of connections that wires all items together.
+
+        Every POWER snap point of the items is considered, and a minimum
+        spanning tree is built between them. Controls are shared between
+        connections on the same snap point, and existing controls sitting on
+        a snap point are reused.
+
+        Args:
+            items (list): The builder objects to connect.
+            builder (Builder): The builder object.
+
+        Returns:
+            list: (start control, end control) pairs for each new line.
+        """
+        positions = []
+        owners = []
+        keys = []
+        for index, item in enumerate(items):
+            # Controls are connection points already.
+            if item.snap_id == "POWER_CONTROL":
+                positions.append(item.matrix_world.to_translation())
+                owners.append(index)
+                keys.append(None)
+                continue
+            for key, matrix in item.get_snap_matrices().items():
+                if "POWER" not in key:
+                    continue
+                positions.append((item.matrix_world @ matrix).to_translation())
+                owners.append(index)
+                keys.append(key)
+
+        # Items with touching snap points are already connected, so treat
+        # them as one group and give each touching point the same control.
+        parents = list(range(len(items)))
+
+        def find(index):
+            root = index
+            while parents[root] != root:
+                root = parents[root]
+            while parents[index] != root:
+                parents[index], index = root, parents[index]
+            return root
+
+        shared_points = {}
+        for cluster in spatial_utils.cluster_points(positions, snapping.SNAP_DISTANCE):
+            # Prefer an existing control over a snap point.
+            shared = next((index for index in cluster if keys[index] is None), cluster[0])
+            for index in cluster:
+                shared_points[index] = shared
+                root = find(owners[index])
+                other_root = find(owners[shared])
+                if root != other_root:
+                    parents[root] = other_root
+        groups = [find(owner) for owner in owners]
+
+        edges = spatial_utils.get_minimum_spanning_tree(positions, groups)
+
+        controls = {}
+        def get_control(point_index):
+            point_index = shared_points[point_index]
+            if point_index in controls:
+                return controls[point_index]
+            item = items[owners[point_index]]
+            position = positions[point_index]
+            control = None
+            if keys[point_index] is None:
+                control = item.object
+            else:
+                # Reuse a control that is already on the snap point.
+                for bpy_object, _, _ in builder.snap_points.get_points_near(position):
+                    if bpy_object.get("SnapID", None) == "POWER_CONTROL":
+                        control = bpy_object
+                        break
+            if not control:
+                control = Line.create_point(
+                    builder,
+                    "_".join([item.name, keys[point_index]])
+                )
+                control.location = position
+                # The world matrix isn't updated until the scene is, set it
+                # so the control can be indexed straight away.
+                control.matrix_world.translation = position
+                control["snapped_to"] = item.name
+                # Later lookups in this run can then reuse it.
+                builder.snap_points.add(control)
+            controls[point_index] = control
+            return control
+
+        result = []
+        for index, other_index in edges:
+            start = get_control(index)
+            end = get_control(other_index)
+            # Don't wire a control to itself.
+            if start == end:
+                continue
+            result.append((start, end))
+        return result
+
     # Serialisation ---
     def serialise(self):
         """Cables/pipes At vector dealt with slightly differnetly.
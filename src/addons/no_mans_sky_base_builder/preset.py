@@ -1,4 +1,3 @@
-import json
 import math
 import os
 from copy import copy
@@ -7,12 +6,22 @@ import bpy
 import mathutils
 import no_mans_sky_base_builder.utils.material as material
 import no_mans_sky_base_builder.part as part
+import no_mans_sky_base_builder.preset_catalogue as preset_catalogue
 import no_mans_sky_base_builder.utils.blend_utils as blend_utils
+import no_mans_sky_base_builder.utils.matrix as matrix_utils
 
 class Preset(object):
 
     USER_PATH = os.path.join(os.path.expanduser("~"), "NoMansSkyBaseBuilder")
     PRESET_PATH = os.path.join(USER_PATH, "presets")
+    # Index of the preset files.
+    CATALOGUE = preset_catalogue.PresetCatalogue(PRESET_PATH)
+    # Recently parsed preset files.
+    DATA_CACHE = preset_catalogue.PresetDataCache()
+    # Name prefix of the hidden collections that instanced presets use.
+    INSTANCE_COLLECTION_PREFIX = "NMS_PRESET_"
+    # The rules used when building many matrices at once.
+    MATRIX_MODE = matrix_utils.PRESET
 
     def __init__(
             self,
@@ -55,8 +64,10 @@ class Preset(object):
                 self.parent = None
                 self.reset_transforms()
 
-                # Place the blender item in the builder cache.
-                builder_object.add_to_preset_cache(preset_id, self.__control)
+                # Place the blender item in the builder cache. Instances
+                # are cheap to create and can't be duplicated as a preset.
+                if self.__control.instance_type != "COLLECTION":
+                    builder_object.add_to_preset_cache(preset_id, self.__control)
 
         # Set some IDs
         self.preset_id = preset_id
@@ -69,30 +80,15 @@ class Preset(object):
     @property
     def data_path(self):
         """Get the JSON data file for the preset."""
-        presets = self.get_presets()
-        path = presets[self.preset_id]
+        path = self.CATALOGUE.get_path(self.preset_id)
+        if not path:
+            raise KeyError(self.preset_id)
         return path
 
     @staticmethod
     def get_presets():
         """Get the list of presets."""
-        presets = os.listdir(Preset.PRESET_PATH)
-        all_presets = {}
-        for preset in presets:
-            full_path = os.path.join(Preset.PRESET_PATH, preset)
-            # Handle category presets.
-            if os.path.isdir(full_path):
-                sub_presets = os.listdir(full_path)
-                for sub_preset in sub_presets:
-                    full_sub_preset_path = os.path.join(full_path, sub_preset)
-                    if os.path.isfile(full_sub_preset_path) and sub_preset.endswith(".json"):
-                        preset_name = os.path.splitext(sub_preset)[0]
-                        all_presets[preset_name] = full_sub_preset_path
-            # Handle root presets.
-            if os.path.isfile(full_path) and preset.endswith(".json"):
-                preset_name = os.path.splitext(preset)[0]
-                all_presets[preset_name] = full_path
-        return all_presets
+        return Preset.CATALOGUE.get_presets()
 
     @property
     def builder(self):
@@ -141,11 +137,10 @@ class Preset(object):
     @staticmethod
     def delete_preset(preset_id):
         """Remove preset."""
-        json_file = preset_id+".json"
-        preset_paths = Preset.get_presets()
-        full_path = preset_paths.get(preset_id, None)
+        full_path = Preset.CATALOGUE.get_path(preset_id)
         if full_path and os.path.isfile(full_path):
             os.remove(full_path)
+        Preset.CATALOGUE.invalidate()
 
     def duplicate(self):
         """Duplicate the part and return it."""
@@ -159,10 +154,16 @@ class Preset(object):
         # Parent each child under 
         for old_child, new_child in zip(self.__control.children, new_children):
             new_child.parent = new_item
+            # Children share their mesh with the original, colour per object.
+            if self.builder.use_instancing:
+                material.use_object_materials(old_child)
+                material.use_object_materials(new_child)
 
         # Link to the scene
         for item in new_children:
             blend_utils.add_to_scene(item)
+            self.builder.registry.update(item)
+        self.builder.registry.update(new_item)
 
         # Remove the constraints.
         new_preset_object = Preset.deserialise_from_object(
@@ -202,7 +203,14 @@ class Preset(object):
         - If the object already exists in the builder cache, we can just
             dupliciate it.
         - If not, generate it via json data.
+
+        When the builder instances presets, the preset is instead built once
+        into a hidden collection, and an empty instancing it is returned.
         """
+        # Instance the preset collection.
+        if self.__create_control and self.builder.use_preset_instancing:
+            return self.create_instance(preset_id)
+
         # Duplicate existing.
         existing_object = self.builder.find_preset_by_id(preset_id)
         if existing_object:
@@ -219,29 +227,95 @@ class Preset(object):
 
     def generate_preset(self, build_rigs=False):
         """Generate the preset."""
-        # Load json file and construct.
+        # Load the (cached) json data and construct.
         parts = []
-        with open(self.data_path) as stream:
-            data = json.load(stream)
-            # Frontiers version check - apply normal.
-            base_version = data.get("BaseVersion", 4)
-            compensate_normal = True
-            if base_version < 5:
-                compensate_normal = False
-            # Reconstruct objects.
-            for part_data in data.get("Objects", []):
-                object_id = part_data["ObjectID"].replace("^","")
-                user_data = part_data["UserData"]
-                use_class = self.builder.get_part_class(object_id)
-                preset_part = use_class.deserialise_from_data(
-                    part_data,
-                    self.builder,
-                    build_rigs=build_rigs,
-                    compensate_normal=compensate_normal
-                )
-                parts.append(preset_part)
+        data = self.DATA_CACHE.get(self.data_path)
+        objects = data["Objects"]
+        compensate_normal = data["CompensateNormal"]
+        # Build all the world matrices in one go.
+        modes = [
+            self.builder.get_part_class(part_data["ObjectID"].replace("^", "")).MATRIX_MODE
+            for part_data in objects
+        ]
+        world_matrices = matrix_utils.create_matrices_from_modes(
+            data["Positions"],
+            data["Ups"],
+            data["Ats"],
+            modes,
+            compensate_normal=compensate_normal
+        )
+        # Reconstruct objects.
+        for part_data, world_matrix in zip(objects, world_matrices):
+            object_id = part_data["ObjectID"].replace("^","")
+            use_class = self.builder.get_part_class(object_id)
+            preset_part = use_class.deserialise_from_data(
+                part_data,
+                self.builder,
+                build_rigs=build_rigs,
+                compensate_normal=compensate_normal,
+                world_matrix=mathutils.Matrix(world_matrix.tolist())
+            )
+            parts.append(preset_part)
         return parts
 
+    def get_instance_collection(self, preset_id):
+        """Get the hidden collection holding the preset parts.
+
+        The preset is generated into the collection the first time, and
+        again whenever the preset file changes. The parts are flagged as
+        templates, so they are left out of the scene queries and are only
+        exported through their instances.
+
+        Args:
+            preset_id (str): The ID of the preset.
+        """
+        collection_name = self.INSTANCE_COLLECTION_PREFIX + preset_id
+        collection = bpy.data.collections.get(collection_name, None)
+        mtime = os.stat(self.data_path).st_mtime
+        if collection and collection.objects:
+            if collection.get("preset_mtime", None) == mtime:
+                return collection
+            # The preset was saved again, replace the old parts. Existing
+            # instances use the same collection, so they update too.
+            templates = list(collection.objects)
+            pointers = [template.as_pointer() for template in templates]
+            bpy.data.batch_remove(templates)
+            for pointer in pointers:
+                self.builder.registry.remove(pointer)
+                self.builder.snap_points.remove(pointer)
+
+        if not collection:
+            collection = bpy.data.collections.new(collection_name)
+            # Not linked to the scene, keep it when saving the blend file.
+            collection.use_fake_user = True
+        collection["preset_mtime"] = mtime
+
+        for preset_part in self.generate_preset():
+            bpy_object = preset_part.object
+            for user_collection in list(bpy_object.users_collection):
+                user_collection.objects.unlink(bpy_object)
+            collection.objects.link(bpy_object)
+            bpy_object["preset_template"] = True
+            preset_part.belongs_to_preset = True
+            material.assign_preset_material(bpy_object)
+        return collection
+
+    def create_instance(self, preset_id):
+        """Create an empty that instances the preset collection.
+
+        Args:
+            preset_id (str): The ID of the preset.
+        """
+        collection = self.get_instance_collection(preset_id)
+        instance = bpy.data.objects.new(preset_id, None)
+        instance.instance_type = "COLLECTION"
+        instance.instance_collection = collection
+        instance.show_name = True
+        instance["PresetID"] = preset_id
+        blend_utils.add_to_scene(instance)
+        self.builder.registry.update(instance)
+        return instance
+
     def create_control(self, preset_items):
         """Create a control for the preset items.
 
@@ -267,6 +341,7 @@ class Preset(object):
         curve_object.name = self.preset_id
         curve_object.show_name = True
         curve_object["PresetID"] = self.preset_id
+        self.builder.registry.update(curve_object)
         # Parent items to control.
         for part in preset_items:
             part.parent = curve_object
@@ -0,0 +1,250 @@
+"""An in-memory index of the preset files in the user preset folder.
+
+Presets live either in the root of the preset folder, or one level down in a
+category folder. Listing every folder each time a preset is looked up gets
+slow with thousands of presets, especially on network synced folders.
+
+The catalogue remembers the listing of each folder along with the folder's
+modification time. Adding, removing or renaming a file changes the mtime of
+its folder, so revalidating only needs a stat of the root and each category
+folder. Only folders that changed are listed again.
+
+The data cache keeps the parsed contents of recently used preset files, so
+placing the same preset again doesn't have to read and parse the JSON.
+"""
+import json
+import os
+import time
+from collections import OrderedDict
+
+import no_mans_sky_base_builder.utils.matrix as matrix_utils
+
+# Folders modified more recently than this are listed again on the next
+# refresh, as some file systems only store mtimes to the nearest 2 seconds.
+MTIME_RESOLUTION = 2.0
+# Default size limit of the data cache, in bytes of preset JSON.
+DATA_CACHE_SIZE = 64 * 1024 * 1024
+
+
+class PresetCatalogue(object):
+
+    def __init__(self, preset_path):
+        """PresetCatalogue __init__
+
+        Args:
+            preset_path (str): The root preset folder.
+        """
+        self.preset_path = preset_path
+        # Folder path -> (mtime, folder listing).
+        self.__folders = {}
+        # Preset ID -> entry dictionary.
+        self.__entries = {}
+        # Preset ID -> path, handed out by get_presets.
+        self.__paths = {}
+        # Category folder names, in listing order.
+        self.__categories = []
+        # Category -> preset IDs in the folder, None for the root folder.
+        self.__category_presets = {None: []}
+
+    def invalidate(self):
+        """List every folder again on the next refresh."""
+        self.__folders.clear()
+
+    def list_folder(self, folder_path):
+        """Get the listing of a folder, only reading it if it changed.
+
+        Returns:
+            tuple: Whether the folder changed, and its listing.
+        """
+        try:
+            mtime = os.stat(folder_path).st_mtime
+        except OSError:
+            changed = folder_path in self.__folders
+            self.__folders.pop(folder_path, None)
+            return changed, []
+
+        cached = self.__folders.get(folder_path, None)
+        if cached and cached[0] == mtime:
+            return False, cached[1]
+
+        listing = os.listdir(folder_path)
+        if time.time() - mtime < MTIME_RESOLUTION:
+            # Too recent to trust, look again next time.
+            self.__folders[folder_path] = (None, listing)
+        else:
+            self.__folders[folder_path] = (mtime, listing)
+        return True, listing
+
+    def refresh(self):
+        """Bring the index up to date with the preset folder."""
+        root_changed, listing = self.list_folder(self.preset_path)
+        if root_changed:
+            self.__categories = [
+                item for item in listing
+                if os.path.isdir(os.path.join(self.preset_path, item))
+            ]
+
+        changed = root_changed
+        category_listings = {}
+        for category in self.__categories:
+            category_path = os.path.join(self.preset_path, category)
+            category_changed, category_listing = self.list_folder(category_path)
+            changed = changed or category_changed
+            category_listings[category] = category_listing
+
+        if not changed:
+            return
+
+        # Forget about folders that were removed.
+        folder_paths = [self.preset_path] + [
+            os.path.join(self.preset_path, category) for category in self.__categories
+        ]
+        for folder_path in list(self.__folders):
+            if folder_path not in folder_paths:
+                del self.__folders[folder_path]
+
+        # Rebuild the index in listing order, so later entries win like they
+        # did when walking the folders directly.
+        entries = {}
+        category_presets = {None: []}
+        for item in listing:
+            if item in category_listings:
+                category_presets[item] = []
+                for sub_item in category_listings[item]:
+                    if not sub_item.endswith(".json"):
+                        continue
+                    category_presets[item].append(os.path.splitext(sub_item)[0])
+                    full_path = os.path.join(self.preset_path, item, sub_item)
+                    self.add_entry(entries, full_path, item)
+            elif item.endswith(".json"):
+                category_presets[None].append(os.path.splitext(item)[0])
+                full_path = os.path.join(self.preset_path, item)
+                self.add_entry(entries, full_path, None)
+
+        self.__entries = entries
+        self.__category_presets = category_presets
+        self.__paths = {preset_id: entry["path"] for preset_id, entry in entries.items()}
+
+    @staticmethod
+    def add_entry(entries, full_path, category):
+        """Add a preset file to the entries, if it is still a file."""
+        try:
+            stat = os.stat(full_path)
+        except OSError:
+            return
+        if not os.path.isfile(full_path):
+            return
+        preset_id = os.path.splitext(os.path.basename(full_path))[0]
+        entries[preset_id] = {
+            "path": full_path,
+            "category": category,
+            "size": stat.st_size,
+            "mtime": stat.st_mtime
+        }
+
+    def get_presets(self):
+        """Get the path of every preset.
+
+        Returns:
+            dict: Preset ID to JSON file path. Don't modify it.
+        """
+        self.refresh()
+        return self.__paths
+
+    def get_entry(self, preset_id):
+        """Get the path, category, size and mtime of a preset."""
+        self.refresh()
+        return self.__entries.get(preset_id, None)
+
+    def get_path(self, preset_id):
+        """Get the JSON file path of a preset, or None if it doesn't exist."""
+        self.refresh()
+        return self.__paths.get(preset_id, None)
+
+    def get_categories(self):
+        """Get the names of the category folders."""
+        self.refresh()
+        return list(self.__categories)
+
+    def get_presets_from_category(self, category):
+        """Get the IDs of the presets in a category, None for the root."""
+        self.refresh()
+        return list(self.__category_presets.get(category, []))
+
+
+class PresetDataCache(object):
+
+    def __init__(self, max_size=DATA_CACHE_SIZE):
+        """PresetDataCache __init__
+
+        Args:
+            max_size (int): How much preset data to keep, measured by the
+                size of the preset files. The least recently used presets are
+                dropped first.
+        """
+        self.max_size = max_size
+        # Path -> (mtime, size, data), least recently used first.
+        self.__items = OrderedDict()
+        self.__total_size = 0
+
+    def clear(self):
+        """Forget all the cached presets."""
+        self.__items.clear()
+        self.__total_size = 0
+
+    @staticmethod
+    def load(path):
+        """Read and validate a preset file.
+
+        Returns:
+            dict: The preset data. "Objects" is the list of object
+                dictionaries, "CompensateNormal" the Frontiers line setting,
+                and "Positions", "Ups" and "Ats" are N x 3 numpy arrays of
+                the object vectors.
+        """
+        with open(path) as stream:
+            data = json.load(stream)
+
+        objects = data.get("Objects", [])
+        if not isinstance(objects, list):
+            raise ValueError("Preset {0} has invalid Objects.".format(path))
+        for part_data in objects:
+            if "ObjectID" not in part_data:
+                raise ValueError("Preset {0} has an object without an ObjectID.".format(path))
+
+        positions, ups, ats = matrix_utils.get_vectors_from_data(objects)
+        return {
+            "Objects": objects,
+            # Frontiers version check - apply normal.
+            "CompensateNormal": data.get("BaseVersion", 4) >= 5,
+            "Positions": positions,
+            "Ups": ups,
+            "Ats": ats
+        }
+
+    def get(self, path):
+        """Get the data of a preset, reading the file if it changed.
+
+        The data is shared, don't modify it.
+
+        Args:
+            path (str): The path to the preset JSON file.
+        """
+        stat = os.stat(path)
+        cached = self.__items.get(path, None)
+        if cached and cached[0] == stat.st_mtime and cached[1] == stat.st_size:
+            self.__items.move_to_end(path)
+            return cached[2]
+
+        data = self.load(path)
+        if cached:
+            self.__total_size -= cached[1]
+        self.__items[path] = (stat.st_mtime, stat.st_size, data)
+        self.__items.move_to_end(path)
+        self.__total_size += stat.st_size
+
+        # Drop the least recently used presets, but always keep this one.
+        while self.__total_size > self.max_size and len(self.__items) > 1:
+            _, (_, size, _) = self.__items.popitem(last=False)
+            self.__total_size -= size
+        return data
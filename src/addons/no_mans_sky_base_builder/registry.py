@@ -0,0 +1,140 @@
+"""A live index of the NMS objects in the Blender scene.
+
+Finding parts used to mean looping over every object in `bpy.data.objects`
+and checking its custom properties. The registry keeps those objects indexed
+by their NMS properties instead, so queries only touch the matching objects.
+
+The builder updates the registry as it creates objects, and the handlers
+registered in the add-on keep it in sync with edits made in Blender itself.
+Undo, redo and loading a file invalidate every object reference, so those
+trigger a full rebuild.
+"""
+from collections import defaultdict
+
+import bpy
+
+
+class SceneRegistry(object):
+
+    # Custom properties that objects are indexed by.
+    KEYS = (
+        "ObjectID",
+        "SnapID",
+        "PresetID",
+        "rig_item",
+        "belongs_to_preset",
+        "NMS_LIGHT",
+        "start_control",
+        "end_control"
+    )
+
+    def __init__(self):
+        """SceneRegistry __init__."""
+        # Key -> property value -> object pointer -> object.
+        self.__index = {key: defaultdict(dict) for key in self.KEYS}
+        # Object pointer -> the values it is indexed under.
+        self.__entries = {}
+        self.__dirty = True
+
+    @staticmethod
+    def is_alive(bpy_object):
+        """Check the Blender object has not been removed."""
+        try:
+            bpy_object.name
+        except ReferenceError:
+            return False
+        return True
+
+    @staticmethod
+    def get_index_value(value):
+        """Make sure a custom property value can be used as a key."""
+        try:
+            hash(value)
+        except TypeError:
+            return str(value)
+        return value
+
+    def invalidate(self):
+        """Rebuild the whole registry on the next query."""
+        self.__dirty = True
+
+    def rebuild(self):
+        """Index every object in the blend data."""
+        for key_index in self.__index.values():
+            key_index.clear()
+        self.__entries.clear()
+        self.__dirty = False
+        for bpy_object in bpy.data.objects:
+            self.update(bpy_object)
+
+    def remove(self, pointer):
+        """Remove an object from the registry by its pointer."""
+        entry = self.__entries.pop(pointer, None)
+        if not entry:
+            return
+        for key, value in entry.items():
+            value_index = self.__index[key][value]
+            value_index.pop(pointer, None)
+            if not value_index:
+                del self.__index[key][value]
+
+    def update(self, bpy_object):
+        """Index the object again using its current properties.
+
+        Args:
+            bpy_object (bpy.types.Object): The object that was added or
+                changed.
+        """
+        if self.__dirty:
+            # A rebuild will pick this object up anyway.
+            return
+        pointer = bpy_object.as_pointer()
+        self.remove(pointer)
+        entry = {}
+        for key in self.KEYS:
+            if key not in bpy_object:
+                continue
+            value = self.get_index_value(bpy_object[key])
+            self.__index[key][value][pointer] = bpy_object
+            entry[key] = value
+        if entry:
+            self.__entries[pointer] = entry
+
+    def get_objects(self, key, value=None):
+        """Get all the objects that have a property.
+
+        The hidden parts of instanced presets are left out, they are only
+        reached through their instances.
+
+        Args:
+            key (str): The custom property name, one of KEYS.
+            value: Only return objects where the property has this value.
+
+        Returns:
+            list: The matching Blender objects.
+        """
+        if self.__dirty:
+            self.rebuild()
+        key_index = self.__index[key]
+        if value is None:
+            value_indices = list(key_index.values())
+        else:
+            value_index = key_index.get(self.get_index_value(value), None)
+            value_indices = [value_index] if value_index else []
+
+        result = []
+        removed = []
+        for value_index in value_indices:
+            for pointer, bpy_object in value_index.items():
+                if not self.is_alive(bpy_object):
+                    removed.append(pointer)
+                elif "preset_template" not in bpy_object:
+                    result.append(bpy_object)
+        # Drop anything deleted since it was registered.
+        for pointer in removed:
+            self.remove(pointer)
+        return result
+
+    def count(self, key):
+        """Get the number of objects that have a property."""
+        return len(self.get_objects(key))
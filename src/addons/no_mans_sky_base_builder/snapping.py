@@ -0,0 +1,544 @@
+"""A compiled version of the snapping json data for quick lookups.
+
+The snapping info is keyed by snap group, with a list of parts in each group.
+Finding the group of a part meant scanning every group, and every snap point
+matrix was rebuilt from nested lists each time it was used. The index does
+that work once when the add-on loads.
+
+The snap point index holds the world space snap points of every part in the
+scene, hashed into a grid of cells the size of the snap distance. Finding the
+points touching a snap point only needs to look in the neighbouring cells,
+rather than comparing against every part.
+
+The snap graph is built from the snap point index in a single pass and
+answers whole-base questions, such as which parts are connected together.
+"""
+import math
+from collections import defaultdict
+
+import mathutils
+
+# Snap points closer than this are considered connected.
+SNAP_DISTANCE = 0.050  # XXX what is actual game threshold?
+
+
+class SnapIndex(object):
+
+    def __init__(self, snap_matrix_dictionary, snap_pair_dictionary):
+        """SnapIndex __init__
+
+        The index is built the first time it is queried, so the snapping
+        data doesn't have to be read while the add-on is loading.
+
+        Args:
+            snap_matrix_dictionary (Mapping): The contents of
+                snapping_info.json.
+            snap_pair_dictionary (Mapping): The contents of
+                snapping_pairs.json.
+        """
+        self.snap_matrix_dictionary = snap_matrix_dictionary
+        self.snap_pair_dictionary = snap_pair_dictionary
+        self.__built = False
+        # ObjectID -> snap group.
+        self.__groups = {}
+        # Snap group -> snap key -> matrix.
+        self.__matrices = {}
+        # Snap group -> snap key -> inverted matrix.
+        self.__inverse_matrices = {}
+        # Target group -> source group -> (target keys, source keys).
+        self.__pairs = {}
+
+    def build(self):
+        """Prepare the matrices and pairings of every snap group."""
+        if self.__built:
+            return
+        self.__built = True
+
+        for group, value in self.snap_matrix_dictionary.items():
+            # Some parts are listed in more than one group, the first wins.
+            for part_id in value["parts"]:
+                self.__groups.setdefault(part_id, group)
+
+            snap_points = value.get("snap_points", {})
+            matrices = {
+                key: mathutils.Matrix(info["matrix"])
+                for key, info in snap_points.items()
+            }
+            self.__matrices[group] = matrices
+            self.__inverse_matrices[group] = {
+                key: matrix.inverted() for key, matrix in matrices.items()
+            }
+
+        for target_group, source_groups in self.snap_pair_dictionary.items():
+            self.__pairs[target_group] = {
+                source_group: (
+                    [key.strip() for key in pairing[0].split(",")],
+                    [key.strip() for key in pairing[1].split(",")]
+                )
+                for source_group, pairing in source_groups.items()
+            }
+
+    def get_group(self, object_id):
+        """Get the snap group of a part.
+
+        Args:
+            object_id (str): The ID of the part.
+
+        Returns:
+            str: The snap group, or None if the part has no snapping.
+        """
+        self.build()
+        return self.__groups.get(object_id, None)
+
+    def get_matrices(self, group):
+        """Get the local matrix of each snap point in a group."""
+        self.build()
+        return self.__matrices.get(group, {})
+
+    def get_inverse_matrices(self, group):
+        """Get the inverted local matrix of each snap point in a group."""
+        self.build()
+        return self.__inverse_matrices.get(group, {})
+
+    def get_pairing(self, target_group, source_group):
+        """Get the snap keys that can be used when snapping two groups.
+
+        Args:
+            target_group (str): The group being snapped on to.
+            source_group (str): The group being snapped.
+
+        Returns:
+            tuple: The list of target keys and the list of source keys, or
+                None if the groups don't snap together.
+        """
+        self.build()
+        return self.__pairs.get(target_group, {}).get(source_group, None)
+
+
+class SnapPointIndex(object):
+
+    def __init__(self, registry, get_snap_matrices, cell_size=SNAP_DISTANCE):
+        """SnapPointIndex __init__
+
+        Args:
+            registry (registry.SceneRegistry): The scene registry, used to
+                find the parts when rebuilding.
+            get_snap_matrices (function): Takes a Blender object and returns
+                its local snap matrices keyed by snap key.
+            cell_size (float): The size of each grid cell.
+        """
+        self.registry = registry
+        self.get_snap_matrices = get_snap_matrices
+        self.cell_size = cell_size
+        # Grid cell -> object pointer -> [(snap key, world position), ...]
+        self.__cells = defaultdict(dict)
+        # Object pointer -> (object, [(snap key, world position), ...])
+        self.__entries = {}
+        # Object pointer -> object, for objects that changed since indexing.
+        self.__stale = {}
+        self.__dirty = True
+        # Increased whenever the indexed points change.
+        self.__version = 0
+
+    @property
+    def version(self):
+        return self.__version
+
+    def get_cell(self, position):
+        """Get the grid cell a position falls into."""
+        return (
+            int(math.floor(position[0] / self.cell_size)),
+            int(math.floor(position[1] / self.cell_size)),
+            int(math.floor(position[2] / self.cell_size))
+        )
+
+    def invalidate(self):
+        """Rebuild the whole index on the next query."""
+        self.__dirty = True
+        self.__stale.clear()
+        self.__version += 1
+
+    def update(self, bpy_object):
+        """Re-index the object on the next query.
+
+        Args:
+            bpy_object (bpy.types.Object): An object that was added or moved.
+        """
+        if self.__dirty:
+            # A rebuild will pick this object up anyway.
+            return
+        self.__stale[bpy_object.as_pointer()] = bpy_object
+
+    def remove(self, pointer):
+        """Remove an object from the index by its pointer."""
+        entry = self.__entries.pop(pointer, None)
+        if not entry:
+            return
+        self.__version += 1
+        for _, position in entry[1]:
+            cell = self.get_cell(position)
+            cell_index = self.__cells.get(cell, None)
+            if cell_index is None:
+                continue
+            cell_index.pop(pointer, None)
+            if not cell_index:
+                del self.__cells[cell]
+
+    def add(self, bpy_object):
+        """Index the current world space snap points of an object."""
+        pointer = bpy_object.as_pointer()
+        self.remove(pointer)
+        if "ObjectID" not in bpy_object and "SnapID" not in bpy_object:
+            return
+        # The hidden parts of instanced presets can't be snapped to.
+        if "preset_template" in bpy_object:
+            return
+        snap_matrices = self.get_snap_matrices(bpy_object)
+        if not snap_matrices:
+            return
+
+        matrix_world = bpy_object.matrix_world
+        points = [
+            (key, (matrix_world @ matrix).to_translation())
+            for key, matrix in snap_matrices.items()
+        ]
+        self.__entries[pointer] = (bpy_object, points)
+        self.__version += 1
+        for key, position in points:
+            cell_index = self.__cells[self.get_cell(position)]
+            cell_index.setdefault(pointer, []).append((key, position))
+
+    def rebuild(self):
+        """Index every part in the scene."""
+        self.__cells.clear()
+        self.__entries.clear()
+        self.__stale.clear()
+        self.__dirty = False
+        self.__version += 1
+        bpy_objects = {}
+        for key in ("ObjectID", "SnapID"):
+            for bpy_object in self.registry.get_objects(key):
+                bpy_objects[bpy_object.as_pointer()] = bpy_object
+        for bpy_object in bpy_objects.values():
+            self.add(bpy_object)
+
+    def sync(self):
+        """Bring the index up to date with any changes."""
+        if self.__dirty:
+            self.rebuild()
+            return
+        stale = list(self.__stale.items())
+        self.__stale.clear()
+        for pointer, bpy_object in stale:
+            try:
+                self.add(bpy_object)
+            except ReferenceError:
+                # The object has been deleted.
+                self.remove(pointer)
+
+    def get_points_near(self, position, distance=SNAP_DISTANCE):
+        """Get the snap points within a distance of a position.
+
+        Args:
+            position (mathutils.Vector): The world space position.
+            distance (float): Only points closer than this are returned.
+
+        Returns:
+            list: (object, snap key, world position) for each point.
+        """
+        self.sync()
+        reach = int(math.ceil(distance / self.cell_size))
+        cell_x, cell_y, cell_z = self.get_cell(position)
+        result = []
+        removed = []
+        for x in range(cell_x - reach, cell_x + reach + 1):
+            for y in range(cell_y - reach, cell_y + reach + 1):
+                for z in range(cell_z - reach, cell_z + reach + 1):
+                    cell_index = self.__cells.get((x, y, z), None)
+                    if not cell_index:
+                        continue
+                    for pointer, points in cell_index.items():
+                        bpy_object = self.__entries[pointer][0]
+                        try:
+                            bpy_object.name
+                        except ReferenceError:
+                            removed.append(pointer)
+                            continue
+                        for key, point in points:
+                            if (point - position).length < distance:
+                                result.append((bpy_object, key, point))
+        # Drop anything deleted since it was indexed.
+        for pointer in set(removed):
+            self.remove(pointer)
+        return result
+
+    def get_connected_objects(
+            self,
+            bpy_object,
+            filter=None,
+            include_controls=True,
+            distance=SNAP_DISTANCE):
+        """Get the objects with a snap point touching one of this object's.
+
+        Args:
+            bpy_object (bpy.types.Object): The object to search from.
+            filter (str): Only use snap points with this in their key.
+            include_controls (bool): Include line control points, which only
+                have a SnapID.
+            distance (float): The snap distance.
+
+        Returns:
+            list: The connected Blender objects.
+        """
+        self.sync()
+        pointer = bpy_object.as_pointer()
+        if pointer not in self.__entries:
+            self.add(bpy_object)
+        entry = self.__entries.get(pointer, None)
+        if not entry:
+            return []
+
+        result = {}
+        for source_key, position in entry[1]:
+            if filter and filter not in source_key:
+                continue
+            for target, target_key, _ in self.get_points_near(position, distance):
+                if target == bpy_object:
+                    continue
+                if filter and filter not in target_key:
+                    continue
+                if not include_controls and "ObjectID" not in target:
+                    continue
+                result[target.as_pointer()] = target
+        return list(result.values())
+
+    def get_objects(self, filter=None):
+        """Get the indexed objects.
+
+        Args:
+            filter (str): Only get objects with a snap point that has this in
+                its key.
+
+        Returns:
+            dict: Object pointer to Blender object.
+        """
+        self.sync()
+        result = {}
+        for pointer, (bpy_object, points) in list(self.__entries.items()):
+            if filter and not any(filter in key for key, _ in points):
+                continue
+            try:
+                bpy_object.name
+            except ReferenceError:
+                self.remove(pointer)
+                continue
+            result[pointer] = bpy_object
+        return result
+
+    def get_connections(self, filter=None, distance=SNAP_DISTANCE):
+        """Get every pair of objects with touching snap points.
+
+        Each cell is only compared with its neighbours, so this is a single
+        pass over the grid.
+
+        Args:
+            filter (str): Only use snap points with this in their key.
+            distance (float): The snap distance.
+
+        Returns:
+            set: (pointer, pointer) pairs, lowest pointer first.
+        """
+        self.sync()
+        reach = int(math.ceil(distance / self.cell_size))
+        offsets = range(-reach, reach + 1)
+        connections = set()
+        for (cell_x, cell_y, cell_z), cell_index in self.__cells.items():
+            for x in offsets:
+                for y in offsets:
+                    for z in offsets:
+                        other_index = self.__cells.get(
+                            (cell_x + x, cell_y + y, cell_z + z),
+                            None
+                        )
+                        if not other_index:
+                            continue
+                        for pointer, points in cell_index.items():
+                            for other_pointer, other_points in other_index.items():
+                                if pointer >= other_pointer:
+                                    continue
+                                pair = (pointer, other_pointer)
+                                if pair in connections:
+                                    continue
+                                if self.is_touching(points, other_points, filter, distance):
+                                    connections.add(pair)
+        return connections
+
+    @staticmethod
+    def is_touching(points, other_points, filter=None, distance=SNAP_DISTANCE):
+        """Check if any two snap points are within the snap distance."""
+        for key, position in points:
+            if filter and filter not in key:
+                continue
+            for other_key, other_position in other_points:
+                if filter and filter not in other_key:
+                    continue
+                if (other_position - position).length < distance:
+                    return True
+        return False
+
+
+class SnapGraph(object):
+
+    def __init__(self, bpy_objects, connections):
+        """SnapGraph __init__
+
+        Args:
+            bpy_objects (dict): Object pointer to Blender object, for every
+                part in the graph.
+            connections (set): (pointer, pointer) pairs of connected parts.
+        """
+        self.objects = bpy_objects
+        # Object pointer -> set of connected object pointers.
+        self.adjacency = {pointer: set() for pointer in bpy_objects}
+        for pointer, other_pointer in connections:
+            if pointer not in self.adjacency or other_pointer not in self.adjacency:
+                continue
+            self.adjacency[pointer].add(other_pointer)
+            self.adjacency[other_pointer].add(pointer)
+
+        self.__parents = {pointer: pointer for pointer in bpy_objects}
+        for pointer, neighbours in self.adjacency.items():
+            for other_pointer in neighbours:
+                self.union(pointer, other_pointer)
+
+        self.__components = None
+        self.__articulation_points = None
+
+    def find(self, pointer):
+        """Find the root of a pointer's component, flattening the path."""
+        parents = self.__parents
+        root = pointer
+        while parents[root] != root:
+            root = parents[root]
+        while parents[pointer] != root:
+            parents[pointer], pointer = root, parents[pointer]
+        return root
+
+    def union(self, pointer, other_pointer):
+        """Merge the components of two pointers."""
+        root = self.find(pointer)
+        other_root = self.find(other_pointer)
+        if root != other_root:
+            self.__parents[other_root] = root
+
+    @staticmethod
+    def is_alive(bpy_object):
+        """Check the Blender object has not been removed."""
+        try:
+            bpy_object.name
+        except ReferenceError:
+            return False
+        return True
+
+    def get_neighbours(self, bpy_object):
+        """Get the objects snapped directly to an object."""
+        neighbours = self.adjacency.get(bpy_object.as_pointer(), ())
+        return [
+            self.objects[pointer] for pointer in neighbours
+            if self.is_alive(self.objects[pointer])
+        ]
+
+    def get_components(self):
+        """Get each group of connected objects.
+
+        Returns:
+            list: A list of Blender objects for each component.
+        """
+        if self.__components is None:
+            components = {}
+            for pointer, bpy_object in self.objects.items():
+                components.setdefault(self.find(pointer), []).append(bpy_object)
+            self.__components = list(components.values())
+        return self.__components
+
+    def get_component(self, bpy_object):
+        """Get all the objects connected to an object, however indirectly."""
+        pointer = bpy_object.as_pointer()
+        if pointer not in self.objects:
+            return []
+        root = self.find(pointer)
+        return [
+            item for other_pointer, item in self.objects.items()
+            if self.find(other_pointer) == root
+        ]
+
+    def is_connected(self, bpy_object, other_object):
+        """Check if two objects are in the same component."""
+        pointer = bpy_object.as_pointer()
+        other_pointer = other_object.as_pointer()
+        if pointer not in self.objects or other_pointer not in self.objects:
+            return False
+        return self.find(pointer) == self.find(other_pointer)
+
+    def get_articulation_points(self):
+        """Get the objects that would split their component if removed.
+
+        Uses an iterative version of Tarjan's algorithm, so large bases don't
+        hit the recursion limit.
+        """
+        if self.__articulation_points is not None:
+            return self.__articulation_points
+
+        discovery = {}
+        low = {}
+        result = set()
+        counter = 0
+        for start in self.adjacency:
+            if start in discovery:
+                continue
+            discovery[start] = low[start] = counter
+            counter += 1
+            root_children = 0
+            # (pointer, parent pointer, neighbour iterator)
+            stack = [(start, None, iter(self.adjacency[start]))]
+            while stack:
+                pointer, parent, neighbours = stack[-1]
+                for neighbour in neighbours:
+                    if neighbour == parent:
+                        continue
+                    if neighbour in discovery:
+                        low[pointer] = min(low[pointer], discovery[neighbour])
+                        continue
+                    discovery[neighbour] = low[neighbour] = counter
+                    counter += 1
+                    if pointer == start:
+                        root_children += 1
+                    stack.append((neighbour, pointer, iter(self.adjacency[neighbour])))
+                    break
+                else:
+                    stack.pop()
+                    if parent is None:
+                        continue
+                    low[parent] = min(low[parent], low[pointer])
+                    if parent != start and low[pointer] >= discovery[parent]:
+                        result.add(parent)
+            if root_children > 1:
+                result.add(start)
+
+        self.__articulation_points = [self.objects[pointer] for pointer in result]
+        return self.__articulation_points
+
+    def get_floating_islands(self, is_anchor):
+        """Get the components that are not attached to anything solid.
+
+        Args:
+            is_anchor (function): Takes a Blender object and returns True if
+                it holds its component in place.
+
+        Returns:
+            list: A list of Blender objects for each floating component.
+        """
+        return [
+            component for component in self.get_components()
+            if not any(is_anchor(bpy_object) for bpy_object in component)
+        ]
@@ -4,10 +4,10 @@ import os
 import bpy
 import no_mans_sky_base_builder.utils.python as python_utils
 
-# Get Colour Information.
+# Get Colour Information, read the first time a colour is looked up.
 FILE_PATH = os.path.dirname(os.path.realpath(__file__))
 COLOURS_JSON = os.path.join(FILE_PATH, "..", "resources", "colours.json")
-material_reference = python_utils.load_dictionary(COLOURS_JSON)
+material_reference = python_utils.LazyDictionary(COLOURS_JSON)
 
 GHOSTED_JSON = os.path.join(FILE_PATH, "..", "resources", "ghosted.json")
 ghosted_reference = python_utils.load_dictionary(GHOSTED_JSON)
@@ -49,12 +49,31 @@ def set_material(item, material):
     if not item.data.materials:
         # Add the material to the object
         item.data.materials.append(material)
+    elif item.material_slots[0].link == "OBJECT":
+        # The mesh is shared with other parts, so colour this object only.
+        item.material_slots[0].material = material
     else:
         # If a material already exists, swap it.
         item.data.materials[0] = material
     return material
 
 
+def use_object_materials(item):
+    """Store the materials of an item on the object instead of its mesh.
+
+    This lets parts that share the same mesh data have their own colour.
+
+    Args:
+        item (bpy.Object): The Blender object.
+    """
+    for slot in item.material_slots:
+        if slot.link == "OBJECT":
+            continue
+        current_material = slot.material
+        slot.link = "OBJECT"
+        slot.material = current_material
+
+
 def assign_power_material(item):
     """Assign light blue material to object.
 
@@ -0,0 +1,224 @@
+"""Vectorised matrix methods for building many NMS transforms at once.
+
+These mirror the per-object `create_matrix_from_vectors` and `serialise`
+methods on Part, Line and Preset, but work on N x 3 vector arrays and
+N x 4 x 4 matrix arrays.
+
+Only NumPy is used, so these can be run outside of Blender.
+"""
+import numpy
+
+# Build modes, matching the class that would otherwise build the matrix.
+PART = "part"
+LINE = "line"
+PRESET = "preset"
+
+# Rotate 90 degrees around X to compensate Blender's Z up axis.
+Z_UP_ROTATION = numpy.array(
+    [
+        [1.0, 0.0, 0.0, 0.0],
+        [0.0, 0.0, -1.0, 0.0],
+        [0.0, 1.0, 0.0, 0.0],
+        [0.0, 0.0, 0.0, 1.0]
+    ]
+)
+# Rotate -90 degrees around X to go back into standard Y up space.
+Y_UP_ROTATION = Z_UP_ROTATION.T
+
+
+def as_vector_array(vectors):
+    """Convert a list of 3 element vectors into an N x 3 float array."""
+    return numpy.asarray(vectors, dtype=float).reshape(-1, 3)
+
+
+def get_lengths(vectors):
+    """Get the length of each vector in an N x 3 array."""
+    return numpy.linalg.norm(vectors, axis=1)
+
+
+def normalize(vectors):
+    """Normalize each vector in an N x 3 array.
+
+    Zero length vectors are left as zero, the same as mathutils.
+    """
+    lengths = get_lengths(vectors)[:, None]
+    return vectors / numpy.where(lengths == 0.0, 1.0, lengths)
+
+
+def create_matrices_from_vectors(positions, ups, ats, mode=PART, compensate_normal=True):
+    """Create world space matrices from lists of Position, Up and At vectors.
+
+    Args:
+        positions (list): N x 3 positions.
+        ups (list): N x 3 up vectors.
+        ats (list): N x 3 aim vectors.
+        mode (str): Which set of rules to build with, one of PART, LINE or
+            PRESET.
+        compensate_normal (bool): For lines, remove the normalised at vector
+            that the Frontiers update adds to the line length.
+
+    Returns:
+        numpy.ndarray: N x 4 x 4 world matrices in Blender Z-up space.
+    """
+    positions = as_vector_array(positions)
+    ups = as_vector_array(ups)
+    ats = as_vector_array(ats)
+
+    # Since Frontiers the line at vector has its normal added on.
+    if mode == LINE and compensate_normal:
+        ats = ats - normalize(ats)
+
+    right_vectors = -normalize(numpy.cross(ats, ups))
+
+    if mode == PART:
+        # Extend `right` and `at` length to match `up` vector length.
+        up_lengths = get_lengths(ups)[:, None]
+        right_vectors = right_vectors * up_lengths
+        ats = normalize(ats) * up_lengths
+    elif mode == PRESET:
+        # The right vector magnitude is an average of the other two.
+        average = (get_lengths(ups) + get_lengths(ats)) * 0.5
+        right_vectors = right_vectors * average[:, None]
+
+    matrices = numpy.zeros((len(positions), 4, 4))
+    matrices[:, :3, 0] = right_vectors
+    matrices[:, :3, 1] = ups
+    matrices[:, :3, 2] = ats
+    matrices[:, :3, 3] = positions
+    matrices[:, 3, 3] = 1.0
+    return numpy.matmul(Z_UP_ROTATION, matrices)
+
+
+def create_vectors_from_matrices(matrices, modes):
+    """Get the Position, Up and At vectors of many world space matrices.
+
+    This is the reverse of `create_matrices_from_vectors`, following the
+    rules of the serialise methods.
+
+    Args:
+        matrices (list): N world matrices, as mathutils matrices or arrays.
+        modes (list): The build mode of each matrix.
+
+    Returns:
+        tuple: N x 3 arrays of positions, up vectors and at vectors.
+    """
+    matrices = numpy.asarray(matrices, dtype=float).reshape(-1, 4, 4)
+    modes = numpy.asarray(modes)
+    # Bring the matrices from Blender Z-Up space into standard Y-up space.
+    offset_matrices = numpy.matmul(Y_UP_ROTATION, matrices)
+    positions = offset_matrices[:, :3, 3]
+    ups = offset_matrices[:, :3, 1]
+    ats = offset_matrices[:, :3, 2]
+    at_normals = normalize(ats)
+    # Parts export a normalized at vector.
+    ats = numpy.where((modes == PART)[:, None], at_normals, ats)
+    # Lines add the normal back on to compensate the 0 distance of a cable.
+    ats = numpy.where((modes == LINE)[:, None], ats + at_normals, ats)
+    return positions, ups, ats
+
+
+def create_matrices_from_data(data_list, modes, compensate_normal=True):
+    """Create world space matrices for a list of NMS object dictionaries.
+
+    Objects are split by mode, so each set of rules is a single pass.
+
+    Args:
+        data_list (list): Dictionaries with Position, Up and At keys.
+        modes (list): The build mode of each dictionary.
+        compensate_normal (bool): Passed on to lines, see
+            `create_matrices_from_vectors`.
+
+    Returns:
+        numpy.ndarray: N x 4 x 4 world matrices, in the same order as the
+            data list.
+    """
+    positions, ups, ats = get_vectors_from_data(data_list)
+    return create_matrices_from_modes(
+        positions, ups, ats, modes, compensate_normal=compensate_normal
+    )
+
+
+def get_vectors_from_data(data_list):
+    """Get the Position, Up and At vectors of NMS object dictionaries.
+
+    Returns:
+        tuple: N x 3 arrays of positions, up vectors and at vectors.
+    """
+    positions = as_vector_array([data.get("Position", [0.0, 0.0, 0.0]) for data in data_list])
+    ups = as_vector_array([data.get("Up", [0.0, 0.0, 0.0]) for data in data_list])
+    ats = as_vector_array([data.get("At", [0.0, 0.0, 0.0]) for data in data_list])
+    return positions, ups, ats
+
+
+def create_matrices_from_modes(positions, ups, ats, modes, compensate_normal=True):
+    """Create world space matrices with a different build mode per vector.
+
+    Args:
+        positions (list): N x 3 positions.
+        ups (list): N x 3 up vectors.
+        ats (list): N x 3 aim vectors.
+        modes (list): The build mode of each set of vectors.
+        compensate_normal (bool): Passed on to lines.
+
+    Returns:
+        numpy.ndarray: N x 4 x 4 world matrices.
+    """
+    positions = as_vector_array(positions)
+    ups = as_vector_array(ups)
+    ats = as_vector_array(ats)
+    modes = numpy.asarray(modes)
+
+    matrices = numpy.zeros((len(positions), 4, 4))
+    for mode in set(modes.tolist()):
+        mask = modes == mode
+        matrices[mask] = create_matrices_from_vectors(
+            positions[mask],
+            ups[mask],
+            ats[mask],
+            mode=mode,
+            compensate_normal=compensate_normal
+        )
+    return matrices
+
+
+def create_line_matrices(starts, ends, scales):
+    """Create the world matrices of lines stretched between two points.
+
+    This matches the driver rig of a line. The line sits on its start point,
+    its Z axis tracks the end point with Y up (a TRACK_TO constraint) and its
+    Z scale is the distance between the two points.
+
+    Args:
+        starts (list): N x 3 start positions.
+        ends (list): N x 3 end positions.
+        scales (list): N x 3 current scales, only X and Y are kept.
+
+    Returns:
+        numpy.ndarray: N x 4 x 4 world matrices.
+    """
+    starts = as_vector_array(starts)
+    ends = as_vector_array(ends)
+    scales = as_vector_array(scales)
+
+    directions = ends - starts
+    lengths = get_lengths(directions)
+    z_axes = normalize(directions)
+    # Lines with no length point up, like an unconstrained line.
+    z_axes[lengths == 0.0] = [0.0, 0.0, 1.0]
+
+    # Point Y as close to world Z as possible.
+    world_up = numpy.array([0.0, 0.0, 1.0])
+    y_axes = world_up - z_axes * numpy.dot(z_axes, world_up)[:, None]
+    # When tracking straight up or down, fall back to world Y.
+    vertical = get_lengths(y_axes) < 1e-6
+    y_axes[vertical] = [0.0, 1.0, 0.0]
+    y_axes = normalize(y_axes)
+    x_axes = numpy.cross(y_axes, z_axes)
+
+    matrices = numpy.zeros((len(starts), 4, 4))
+    matrices[:, :3, 0] = x_axes * scales[:, 0, None]
+    matrices[:, :3, 1] = y_axes * scales[:, 1, None]
+    matrices[:, :3, 2] = z_axes * lengths[:, None]
+    matrices[:, :3, 3] = starts
+    matrices[:, 3, 3] = 1.0
+    return matrices
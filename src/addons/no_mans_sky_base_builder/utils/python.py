@@ -1,5 +1,6 @@
 """Convenient Python related methods."""
 import json
+from collections.abc import Mapping
 
 
 def load_dictionary(json_path):
@@ -17,6 +18,39 @@ def load_dictionary(json_path):
     return dictionary
 
 
+class LazyDictionary(Mapping):
+    """A read only dictionary that loads its JSON file on first use.
+
+    Several large JSON resources used to be loaded when the add-on was
+    imported, slowing down Blender's startup even if they were never used.
+    """
+
+    def __init__(self, json_path):
+        """LazyDictionary __init__
+
+        Args:
+            json_path (str): The path to the JSON file.
+        """
+        self.json_path = json_path
+        self.__data = None
+
+    @property
+    def data(self):
+        """The dictionary, loading it if this is the first use."""
+        if self.__data is None:
+            self.__data = load_dictionary(self.json_path)
+        return self.__data
+
+    def __getitem__(self, key):
+        return self.data[key]
+
+    def __iter__(self):
+        return iter(self.data)
+
+    def __len__(self):
+        return len(self.data)
+
+
 def get_adjacent_dict_key(data, current, step="next"):
     """Get the next key in the dictionary
     
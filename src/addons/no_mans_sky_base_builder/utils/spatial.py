@@ -0,0 +1,148 @@
+"""Methods for grouping and connecting points in space.
+
+When clustering, points are hashed into a grid of cells the size of the
+tolerance, so each point only has to be compared with the points in its
+neighbouring cells.
+
+When connecting, a KD-tree gives the nearest neighbours of each point, so the
+spanning tree only has to consider a handful of candidate edges per point.
+"""
+import math
+
+from mathutils import kdtree
+
+
+def get_cell(position, cell_size):
+    """Get the grid cell a position falls into."""
+    return tuple(int(math.floor(value / cell_size)) for value in position)
+
+
+def get_distance(position, other_position):
+    """Get the distance between two 3 element positions."""
+    return math.sqrt(
+        (other_position[0] - position[0])**2 +
+        (other_position[1] - position[1])**2 +
+        (other_position[2] - position[2])**2
+    )
+
+
+def cluster_points(positions, tolerance):
+    """Group together positions that are within a tolerance of each other.
+
+    Groups are chained, if A is close to B and B is close to C then all three
+    are in the same group even if A and C are further apart.
+
+    Args:
+        positions (list): 3 element positions.
+        tolerance (float): The largest distance between two grouped points.
+
+    Returns:
+        list: A list of position indices for each group, in the order they
+            first appear. Positions without any neighbours get a group of
+            their own.
+    """
+    # Hash each position into the grid.
+    cells = {}
+    for index, position in enumerate(positions):
+        cells.setdefault(get_cell(position, tolerance), []).append(index)
+
+    # Union-find parent of each position, the lowest index is the root.
+    parents = list(range(len(positions)))
+
+    def find(index):
+        root = index
+        while parents[root] != root:
+            root = parents[root]
+        while parents[index] != root:
+            parents[index], index = root, parents[index]
+        return root
+
+    offsets = (-1, 0, 1)
+    for (x, y, z), indices in cells.items():
+        for offset_x in offsets:
+            for offset_y in offsets:
+                for offset_z in offsets:
+                    other_indices = cells.get(
+                        (x + offset_x, y + offset_y, z + offset_z),
+                        None
+                    )
+                    if not other_indices:
+                        continue
+                    for index in indices:
+                        for other_index in other_indices:
+                            if other_index <= index:
+                                continue
+                            distance = get_distance(
+                                positions[index],
+                                positions[other_index]
+                            )
+                            if distance > tolerance:
+                                continue
+                            root = find(index)
+                            other_root = find(other_index)
+                            if root != other_root:
+                                parents[max(root, other_root)] = min(root, other_root)
+
+    clusters = {}
+    for index in range(len(positions)):
+        clusters.setdefault(find(index), []).append(index)
+    return list(clusters.values())
+
+
+def get_minimum_spanning_tree(positions, groups, neighbours=8):
+    """Find the shortest set of edges that connects every group of points.
+
+    Uses Kruskal's algorithm on the nearest neighbours of each point. If that
+    doesn't connect every group, more neighbours are considered until it does.
+
+    Args:
+        positions (list): 3 element positions.
+        groups (list): The group of each position. Points in the same group
+            are already connected, such as snap points on the same part.
+        neighbours (int): How many neighbours of each point to start with.
+
+    Returns:
+        list: (index, index) position pairs for each edge of the tree.
+    """
+    group_count = len(set(groups))
+    if group_count < 2:
+        return []
+
+    tree = kdtree.KDTree(len(positions))
+    for index, position in enumerate(positions):
+        tree.insert(position, index)
+    tree.balance()
+
+    count = neighbours
+    while True:
+        count = min(count, len(positions))
+        edges = set()
+        for index, position in enumerate(positions):
+            for _, other_index, distance in tree.find_n(position, count):
+                if groups[other_index] == groups[index]:
+                    continue
+                edges.add((distance, min(index, other_index), max(index, other_index)))
+
+        # Union-find parent of each group.
+        parents = {group: group for group in groups}
+
+        def find(group):
+            root = group
+            while parents[root] != root:
+                root = parents[root]
+            while parents[group] != root:
+                parents[group], group = root, parents[group]
+            return root
+
+        result = []
+        for _, index, other_index in sorted(edges):
+            root = find(groups[index])
+            other_root = find(groups[other_index])
+            if root == other_root:
+                continue
+            parents[other_root] = root
+            result.append((index, other_index))
+
+        if len(result) == group_count - 1 or count == len(positions):
+            return result
+        count *= 2